@@ -3,6 +3,9 @@ import dash
 import os
 
 # Paths to storage directory and for the qrcodes + subject sheets
+from exceptions.Exceptions import MissingSecretKeyException
+from security import get_secret_key, is_multi_process
+from security.SecretKeySessionInterface import SecretKeySessionInterface
 from security.DashboardUser import DashboardUser
 
 dash_study_folder = 'Studies'
@@ -10,14 +13,49 @@ os.makedirs(dash_study_folder, exist_ok=True)
 sheets_folder = 'Subject-Sheets'
 qr_folder = 'QR-Codes'
 zip_file = 'sheets.zip'
+# zipped bundles of unused subject sheets, see SheetBundleCache
+sheet_bundle_folder = 'Sheet-Bundles'
+sheet_bundle_cache_max_bytes = int(os.environ.get('SHEET_BUNDLE_CACHE_MB', 1024)) * 1024 * 1024
+# local index of push tokens and status of the user jsons, see UserIndex
+user_index_file = 'user-index.sqlite'
+# state of background jobs and number of jobs running at the same time, see JobQueue
+jobs_folder = 'Jobs'
+job_workers = int(os.environ.get('JOB_WORKERS', 2))
+# exposes latency, response size, error and in-flight metrics of callbacks and routes on /metrics, see Metrics
+metrics_enabled = os.environ.get('METRICS', '0') == '1'
+# opt-in profiling of dash callbacks and functions decorated with profiled: comma separated callback ids, callback
+# outputs or function names ('*' for all) and/or share of sampled calls, mode cprofile or tracemalloc. These are the
+# initial settings, they can be changed at runtime on /admin/profiles/settings. The newest profiles are kept and
+# downloadable on /admin/profiles.
+profile_targets = set(filter(None, os.environ.get('PROFILE_TARGETS', '').split(',')))
+profile_sample_rate = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+profile_mode = os.environ.get('PROFILE_MODE', 'cprofile')
+profiles_folder = 'Profiles'
+profile_ring_size = int(os.environ.get('PROFILE_RING_SIZE', 50))
 
-storage_folder = os.path.join('/', 'mnt', 'jutrack_data')
+storage_folder = os.environ.get('JUTRACK_STORAGE', os.path.join('/', 'mnt', 'jutrack_data'))
 studies = 'studies'
 archive = 'archive'
 users = 'users'
 image_resources = 'image_resources'
 csv_prefix = 'jutrack_dashboard_'
 
+# memory budget of the cache holding processed study data frames
+study_cache_max_bytes = int(os.environ.get('STUDY_CACHE_MB', 512)) * 1024 * 1024
+# qr codes are drawn directly into the subject sheets, png files of the qr codes are only written if set
+write_qr_images = os.environ.get('WRITE_QR_IMAGES', '0') == '1'
+# number of processes creating qr codes and subject sheets, 1 creates them in the calling process. The processes are
+# started with the python interpreter, under mod_wsgi sys.executable is httpd and the interpreter has to be configured.
+subject_creation_workers = int(os.environ.get('SUBJECT_CREATION_WORKERS', 1))
+subject_creation_python = os.environ.get('SUBJECT_CREATION_PYTHON')
+# concurrent requests, timeout in seconds and retries per batch of push notifications sent to firebase
+push_notification_workers = int(os.environ.get('PUSH_NOTIFICATION_WORKERS', 8))
+push_notification_timeout = float(os.environ.get('PUSH_NOTIFICATION_TIMEOUT', 10))
+push_notification_retries = int(os.environ.get('PUSH_NOTIFICATION_RETRIES', 3))
+# size of the chunks in which the browser uploads EMA files and maximum size of an uploaded file, see UploadStore
+upload_chunk_size = int(os.environ.get('UPLOAD_CHUNK_MB', 4)) * 1024 * 1024
+upload_max_bytes = int(os.environ.get('UPLOAD_MAX_MB', 2048)) * 1024 * 1024
+
 if getpass.getuser() == 'msfz' or getpass.getuser() == 'micst':
     home = os.path.expanduser('~')
     storage_folder = os.path.join(os.path.expanduser('~'), 'mnt', 'jutrack_data')
@@ -28,6 +66,16 @@ studies_folder = os.path.join(storage_folder, studies)
 archive_folder = os.path.join(storage_folder, archive)
 users_folder = os.path.join(storage_folder, users)
 image_resources_folder = os.path.join(storage_folder, image_resources)
+# unfinished and unused uploads, on the same file system as the image resources so finished uploads are only moved
+uploads_folder = os.path.join(image_resources_folder, '.uploads')
+# key signing the session cookies, shared by all dashboard processes. Taken from DASHBOARD_SECRET_KEY, which is required
+# if the dashboard runs in several processes, otherwise from this file which is created on the first request
+secret_key_file = os.path.join(storage_folder, '.dashboard-secret.key')
 
+# user of the current request, name and role are kept in the session cookie
 user = DashboardUser()
 app = dash.Dash(__name__, suppress_callback_exceptions=True)
+if is_multi_process() and not os.environ.get('DASHBOARD_SECRET_KEY'):
+    raise MissingSecretKeyException
+app.server.session_interface = SecretKeySessionInterface(lambda: get_secret_key(secret_key_file))
+app.server.config.update(SESSION_COOKIE_HTTPONLY=True, SESSION_COOKIE_SAMESITE='Lax')
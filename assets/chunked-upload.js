@@ -0,0 +1,94 @@
+// Uploads the file selected in or dropped on a div with class chunked-upload in chunks to /uploads, see
+// uploads/upload_callbacks.py, so large files never have to be held in memory. The handle of the finished upload is set
+// as value of the dash input named in data-handle, which triggers the callbacks using it.
+(function () {
+    var maxRetries = 3;
+
+    function setStatus(uploadDiv, text) {
+        uploadDiv.querySelector('.chunked-upload-status').textContent = text;
+    }
+
+    function setHandle(uploadDiv, handle) {
+        var handleInput = document.getElementById(uploadDiv.dataset.handle);
+        var setValue = Object.getOwnPropertyDescriptor(window.HTMLInputElement.prototype, 'value').set;
+        setValue.call(handleInput, handle);
+        handleInput.dispatchEvent(new Event('input', {bubbles: true}));
+    }
+
+    function send(method, url, body, headers) {
+        return fetch(url, {method: method, body: body, headers: headers, credentials: 'same-origin'}).then(function (response) {
+            // 409: the chunk did not start at the received bytes, the response tells where to continue
+            if (!response.ok && response.status !== 409) {
+                throw new Error(response.status + ' ' + response.statusText);
+            }
+            return response.json();
+        });
+    }
+
+    async function upload(uploadDiv, file) {
+        var chunkSize = parseInt(uploadDiv.dataset.chunkSize, 10);
+        setHandle(uploadDiv, '');
+        try {
+            var started = await send('POST', '/uploads', JSON.stringify({filename: file.name, size: file.size}),
+                {'Content-Type': 'application/json'});
+            var uploadUrl = '/uploads/' + started.id;
+            var offset = 0;
+            var failures = 0;
+            while (offset < file.size) {
+                setStatus(uploadDiv, 'Uploading ' + file.name + ': ' + Math.floor(100 * offset / file.size) + '%');
+                try {
+                    offset = (await send('PUT', uploadUrl, file.slice(offset, offset + chunkSize),
+                        {'Content-Type': 'application/octet-stream', 'Upload-Offset': String(offset)})).received;
+                    failures = 0;
+                } catch (error) {
+                    if (++failures > maxRetries) {
+                        throw error;
+                    }
+                    // the chunk may have been written partially, continue at the bytes received by the server
+                    offset = (await send('GET', uploadUrl)).received;
+                }
+            }
+            setStatus(uploadDiv, '');
+            setHandle(uploadDiv, started.id);
+        } catch (error) {
+            setStatus(uploadDiv, 'Upload of ' + file.name + ' failed: ' + error.message);
+        }
+    }
+
+    function getUploadDiv(event) {
+        return event.target.closest ? event.target.closest('.chunked-upload') : null;
+    }
+
+    document.addEventListener('click', function (event) {
+        var uploadDiv = getUploadDiv(event);
+        if (uploadDiv) {
+            var fileInput = document.createElement('input');
+            fileInput.type = 'file';
+            if (uploadDiv.dataset.accept) {
+                fileInput.accept = uploadDiv.dataset.accept;
+            }
+            fileInput.addEventListener('change', function () {
+                if (fileInput.files.length) {
+                    upload(uploadDiv, fileInput.files[0]);
+                }
+            });
+            fileInput.click();
+        }
+    });
+
+    document.addEventListener('dragover', function (event) {
+        if (getUploadDiv(event)) {
+            event.preventDefault();
+        }
+    });
+
+    document.addEventListener('drop', function (event) {
+        var uploadDiv = getUploadDiv(event);
+        if (uploadDiv) {
+            event.preventDefault();
+            if (event.dataTransfer.files.length) {
+                upload(uploadDiv, event.dataTransfer.files[0]);
+            }
+        }
+    });
+})();
@@ -0,0 +1,49 @@
+// Callbacks only changing the state of the page, they run in the browser and do not send requests to the server.
+// Registered with app.clientside_callback in create_callbacks.py and display_callbacks.py.
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    create_study: {
+        update_study_details: function (name, duration, subjectNumber, description, data) {
+            return Object.assign({}, data, {
+                'name': name,
+                'duration': duration,
+                'number-of-subjects': subjectNumber,
+                'description': description
+            });
+        },
+
+        update_ema_details: function (emaJsonHandle, emaImagesHandle, data) {
+            return Object.assign({}, data, {
+                'survey': emaJsonHandle || null,
+                'images': emaImagesHandle || null
+            });
+        },
+
+        update_passive_monitoring_details: function (frequency, sensorList, labelingList, data) {
+            return Object.assign({}, data, {
+                'frequency': frequency,
+                'sensor-list': sensorList,
+                'active_labeling': labelingList
+            });
+        }
+    },
+
+    display_study: {
+        // selects a group of receivers on click of an autofill button (the group values of ReceiverIndex, resolved on
+        // the server) and clears the form after a notification was sent
+        update_push_notification_form: function (missingDataClicks, everyUserClicks, sentJobId) {
+            var noUpdate = window.dash_clientside.no_update;
+            var triggered = window.dash_clientside.callback_context.triggered;
+            if (!triggered.length || !triggered[0].value) {
+                throw window.dash_clientside.PreventUpdate;
+            }
+            switch (triggered[0].prop_id) {
+                case 'user-with-missing-data-button.n_clicks':
+                    return [noUpdate, noUpdate, ['@missing-data']];
+                case 'every-user-button.n_clicks':
+                    return [noUpdate, noUpdate, ['@all']];
+                default:
+                    return ['', '', []];
+            }
+        }
+    }
+});
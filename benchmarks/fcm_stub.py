@@ -0,0 +1,91 @@
+"""
+Local stand-in for the legacy firebase cloud messaging http endpoint (https://fcm.googleapis.com/fcm/send).
+
+Every request is answered after a fixed latency. Like firebase, requests with more than 1000 registration ids are
+rejected. Tokens starting with 'invalid' are answered with NotRegistered, a share of the requests can be failed with
+503 to exercise retries.
+
+    python -m benchmarks.fcm_stub --port 8765 --latency 0.05
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+max_registration_ids = 1000
+
+
+class FcmStubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+        tokens = body.get('registration_ids', [])
+        with server.lock:
+            server.requests += 1
+            server.tokens += len(tokens)
+
+        time.sleep(server.latency)
+        if len(tokens) > max_registration_ids:
+            return self.reply(400, {'error': 'Too many registration ids'})
+        if random.random() < server.fail_ratio:
+            return self.reply(503, {'error': 'Unavailable'})
+
+        results = [{'error': 'NotRegistered'} if token.startswith('invalid') else {'message_id': '0:' + str(i)}
+                   for i, token in enumerate(tokens)]
+        failure = sum('error' in result for result in results)
+        self.reply(200, {'multicast_id': random.getrandbits(63), 'success': len(results) - failure, 'failure': failure,
+                         'canonical_ids': 0, 'results': results})
+
+    def reply(self, status, content):
+        payload = json.dumps(content).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server(port=0, latency=0.05, fail_ratio=0.0):
+    """
+    Starts the stub server in a daemon thread
+
+    :param port: port to listen on, 0 picks a free port
+    :param latency: seconds every request takes
+    :param fail_ratio: share of requests answered with 503
+    :return: server and url of the send endpoint
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', port), FcmStubHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.fail_ratio = fail_ratio
+    server.lock = threading.Lock()
+    server.requests = 0
+    server.tokens = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, 'http://127.0.0.1:' + str(server.server_address[1]) + '/fcm/send'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local firebase cloud messaging stub')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--fail-ratio', type=float, default=0.0)
+    args = parser.parse_args()
+
+    server, url = start_stub_server(args.port, args.latency, args.fail_ratio)
+    print('Serving ' + url)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
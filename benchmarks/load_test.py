@@ -0,0 +1,132 @@
+"""
+Load test of the dashboard with several worker processes. Like gunicorn or mod_wsgi daemon processes, the workers
+are forked after the app was imported and accept connections from one shared socket, so consecutive requests of a
+client are served by different processes.
+
+Every client logs in once and then repeatedly opens the create study page, which is only returned for the role master.
+The test fails if any request was answered without the session of the client.
+
+    python -m benchmarks.load_test --user admin --password secret --workers 1 2 4
+"""
+import argparse
+import multiprocessing
+import os
+import signal
+import socket
+import time
+
+import requests
+from werkzeug.serving import make_server, WSGIRequestHandler
+
+login_output = '..login-div.children...page-body.children...login-output-state.children...username.value...passwd.value..'
+menu_buttons = ['create-button', 'current-studies-button', 'about-button', 'close-button']
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+def start_workers(application, workers):
+    """
+    Forks worker processes serving the application from one socket
+
+    :param application: wsgi application
+    :param workers: number of processes
+    :return: url of the server and process ids of the workers
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(('127.0.0.1', 0))
+    sock.listen(128)
+    sock.set_inheritable(True)
+
+    pids = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            server = make_server('127.0.0.1', sock.getsockname()[1], application, request_handler=QuietRequestHandler,
+                                 fd=sock.fileno())
+            server.serve_forever()
+            os._exit(0)
+        pids.append(pid)
+    url = 'http://127.0.0.1:' + str(sock.getsockname()[1])
+    sock.close()
+    return url, pids
+
+
+def stop_workers(pids):
+    for pid in pids:
+        os.kill(pid, signal.SIGTERM)
+        os.waitpid(pid, 0)
+
+
+def login(session, url, username, password):
+    session.get(url + '/')
+    response = session.post(url + '/_dash-update-component', json={
+        'output': login_output,
+        'outputs': [{'id': 'login-div', 'property': 'children'}, {'id': 'page-body', 'property': 'children'},
+                    {'id': 'login-output-state', 'property': 'children'}, {'id': 'username', 'property': 'value'},
+                    {'id': 'passwd', 'property': 'value'}],
+        'inputs': [{'id': 'login-button', 'property': 'n_clicks', 'value': 1}],
+        'changedPropIds': ['login-button.n_clicks'],
+        'state': [{'id': 'username', 'property': 'value', 'value': username},
+                  {'id': 'passwd', 'property': 'value', 'value': password}]})
+    return response.status_code == 200 and 'Logged in successfully!' in response.text
+
+
+def open_create_page(session, url):
+    response = session.post(url + '/_dash-update-component', json={
+        'output': 'content-div.children',
+        'outputs': {'id': 'content-div', 'property': 'children'},
+        'inputs': [{'id': button, 'property': 'n_clicks', 'value': 1 if button == 'create-button' else None}
+                   for button in menu_buttons],
+        'changedPropIds': ['create-button.n_clicks'],
+        'state': []})
+    return response.status_code == 200 and 'create-study-button' in response.text
+
+
+def run_client(args):
+    """
+    :return: number of authorized and unauthorized responses
+    """
+    url, username, password, n_requests = args
+    session = requests.Session()
+    if not login(session, url, username, password):
+        return 0, n_requests
+    authorized = sum(open_create_page(session, url) for _ in range(n_requests))
+    return authorized, n_requests - authorized
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test with several dashboard worker processes')
+    parser.add_argument('--user', required=True, help='user with role master in the password file')
+    parser.add_argument('--password', required=True)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--clients', type=int, default=8, help='concurrent clients')
+    parser.add_argument('--requests', type=int, default=200, help='requests per client')
+    args = parser.parse_args()
+
+    from index import app
+
+    print('{:>8} {:>9} {:>9} {:>13} {:>14}'.format('workers', 'requests', 'seconds', 'requests/s', 'unauthorized'))
+    for workers in args.workers:
+        url, pids = start_workers(app.server, workers)
+        try:
+            time.sleep(0.5)
+            with multiprocessing.get_context('fork').Pool(args.clients) as pool:
+                start = time.perf_counter()
+                results = pool.map(run_client, [(url, args.user, args.password, args.requests)] * args.clients)
+                seconds = time.perf_counter() - start
+        finally:
+            stop_workers(pids)
+
+        authorized = sum(result[0] for result in results)
+        unauthorized = sum(result[1] for result in results)
+        print('{:>8} {:>9} {:>9.2f} {:>13.1f} {:>14}'.format(workers, authorized + unauthorized, seconds,
+                                                              (authorized + unauthorized) / seconds, unauthorized))
+
+
+if __name__ == '__main__':
+    main()
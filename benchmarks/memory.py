@@ -0,0 +1,33 @@
+import resource
+
+
+def reset_peak_rss():
+    """
+    Resets the peak resident set size of the current process (Linux only). ru_maxrss can not be reset and even survives
+    exec, it therefore includes the memory of the parent process if the benchmark runs in a subprocess.
+
+    :return: True if the peak was reset
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def get_rss_mb(field='VmHWM'):
+    """
+    Resident set size of the current process in MB
+
+    :param field: VmHWM for the peak since the last reset, VmRSS for the current size
+    :return: size in MB
+    """
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
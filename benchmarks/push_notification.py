@@ -0,0 +1,62 @@
+"""
+Measures the latency of sending one push notification to many receivers against the local firebase stub.
+
+'sequential' sends the batches one after another with a new connection per request like the previous
+send_push_notification did (which additionally sent all tokens in one request), 'dispatcher' uses FirebaseDispatcher.
+
+    python -m benchmarks.push_notification --tokens 1000 10000 50000 --latency 0.05
+"""
+import argparse
+import time
+
+import requests
+
+from benchmarks.fcm_stub import start_stub_server
+from study.display_study.FirebaseDispatcher import FirebaseDispatcher, firebase_max_batch_size
+
+data = {'title': 'Benchmark', 'body': 'Please open the app'}
+
+
+def send_sequential(url, tokens):
+    errors = 0
+    for i in range(0, len(tokens), firebase_max_batch_size):
+        response = requests.post(url, headers={'Authorization': 'key=benchmark'},
+                                 json={'data': data, 'registration_ids': tokens[i:i + firebase_max_batch_size]})
+        errors += response.status_code != 200
+    return errors
+
+
+def send_dispatcher(dispatcher, url, tokens):
+    return sum(batch['error'] is not None for batch in dispatcher.send(url, [('key=benchmark', data, tokens)]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark of push notification dispatch')
+    parser.add_argument('--tokens', type=int, nargs='+', default=[1000, 10000, 50000])
+    parser.add_argument('--latency', type=float, default=0.05, help='seconds the stub needs per request')
+    parser.add_argument('--fail-ratio', type=float, default=0.0, help='share of requests the stub fails with 503')
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--retries', type=int, default=3)
+    args = parser.parse_args()
+
+    server, url = start_stub_server(latency=args.latency, fail_ratio=args.fail_ratio)
+    dispatcher = FirebaseDispatcher(args.workers, timeout=10, retries=args.retries, backoff=0.05)
+
+    print('{:>8} {:>11} {:>9} {:>9} {:>14}'.format('tokens', 'mode', 'seconds', 'requests', 'failed batches'))
+    for n_tokens in args.tokens:
+        tokens = ['token_' + str(i) for i in range(n_tokens)]
+        for mode in ('sequential', 'dispatcher'):
+            server.requests = 0
+            start = time.perf_counter()
+            if mode == 'sequential':
+                failed = send_sequential(url, tokens)
+            else:
+                failed = send_dispatcher(dispatcher, url, tokens)
+            seconds = time.perf_counter() - start
+            print('{:>8} {:>11} {:>9.2f} {:>9} {:>14}'.format(n_tokens, mode, seconds, server.requests, failed))
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
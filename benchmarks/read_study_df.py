@@ -0,0 +1,112 @@
+"""
+Compares wall time and peak memory of reading a study csv with the column-pruned, chunked loader (read_study_csv)
+against the previous loader which read the whole csv and replaced all empty values with strings.
+
+Every measurement runs in a fresh process so that the peak resident set size only covers one read.
+
+    python -m benchmarks.read_study_df --rows 10000 100000 1000000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.memory import reset_peak_rss, get_rss_mb
+
+activations = 2
+# typical passive monitoring study, the csv still contains the columns of all sensors
+sensor_list = ['accelerometer', 'activity', 'application_usage', 'gyroscope', 'location']
+
+
+def legacy_read_study_df(study_csv, study_json):
+    """
+    read_study_df before column pruning, chunking and typed columns
+    """
+    import numpy as np
+    import pandas as pd
+    from study import table_columns, sensors_per_modality_dict, main, ema
+
+    study_df = pd.read_csv(study_csv)
+    study_df = study_df.reindex(columns=table_columns)
+    study_df = study_df.rename(columns={"subject_name": "id"})
+
+    unused_data = np.setdiff1d(sensors_per_modality_dict[main], study_json["sensor-list"]) if 'sensor-list' in study_json else sensors_per_modality_dict[main]
+    if 'survey' not in study_json:
+        unused_data = np.concatenate((unused_data, sensors_per_modality_dict[ema]), axis=None)
+    for data in unused_data:
+        study_df[data + ' n_batches'] = study_df[data + ' n_batches'].replace(to_replace=[0], value=np.nan)
+        study_df[data + ' last_time_received'] = study_df[data + ' last_time_received'].replace(to_replace=['none'], value=np.nan)
+    study_df = pd.DataFrame.dropna(study_df, axis=1, how='all')
+
+    study_df = study_df.replace(to_replace=[np.nan, 'none', 0], value='')
+    return study_df.sort_values(by=['app', 'id']).reset_index(drop=True)
+
+
+def measure(loader, study_csv, study_json_path):
+    """
+    Runs one loader in the current process
+
+    :return: dict with wall time in seconds, peak rss and frame memory in MB
+    """
+    from study.display_study.study_data import read_study_csv
+
+    with open(study_json_path) as f:
+        study_json = json.load(f)
+    read = legacy_read_study_df if loader == 'legacy' else read_study_csv
+
+    reset_peak_rss()
+    start_rss = get_rss_mb('VmRSS')
+    start = time.perf_counter()
+    study_df = read(study_csv, study_json)
+    seconds = time.perf_counter() - start
+    peak_rss = get_rss_mb()
+
+    return {'seconds': seconds,
+            'peak_rss_mb': peak_rss,
+            'rss_increase_mb': peak_rss - start_rss,
+            'frame_mb': study_df.memory_usage(index=True, deep=True).sum() / 1024 ** 2,
+            'rows': len(study_df.index)}
+
+
+def run_in_subprocess(loader, study_csv, study_json_path):
+    output = subprocess.check_output([sys.executable, '-m', 'benchmarks.read_study_df', '--measure', loader,
+                                      study_csv, study_json_path])
+    return json.loads(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark of read_study_df')
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--data-dir', default=os.path.join(tempfile.gettempdir(), 'jutrack_benchmarks'))
+    parser.add_argument('--measure', nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        print(json.dumps(measure(*args.measure)))
+        return
+
+    from benchmarks.synthetic_study import write_synthetic_study
+
+    print('{:>9} {:>8} {:>9} {:>13} {:>15} {:>10}'.format('rows', 'loader', 'seconds', 'peak rss MB',
+                                                         'rss increase MB', 'frame MB'))
+    for n_rows in args.rows:
+        study_id = 'BENCH' + str(n_rows)
+        # every subject has main app activations, half of them additionally ema activations
+        n_subjects = max(int(n_rows / (activations * 1.5)), 1)
+        study_csv, _ = write_synthetic_study(args.data_dir, study_id, n_subjects, sensor_list=sensor_list,
+                                             activations=activations)
+        study_json_path = os.path.join(args.data_dir, study_id + '.json')
+
+        for loader in ('legacy', 'chunked'):
+            result = run_in_subprocess(loader, study_csv, study_json_path)
+            print('{:>9} {:>8} {:>9.2f} {:>13.1f} {:>15.1f} {:>10.1f}'.format(result['rows'], loader, result['seconds'],
+                                                                           result['peak_rss_mb'],
+                                                                           result['rss_increase_mb'],
+                                                                           result['frame_mb']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+Cold start of the dashboard as seen after a worker recycle: every run starts a fresh interpreter which imports the wsgi
+entry point (index) and answers the requests a browser sends when the page is opened.
+
+    python -m benchmarks.startup --runs 5
+    python -m benchmarks.startup --repository /path/to/other/checkout
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+repository_folder = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+heavy_modules = ['pandas', 'numpy', 'fpdf', 'qrcode', 'requests', 'dash_table', 'PIL']
+first_requests = ['/', '/_dash-layout', '/_dash-dependencies']
+
+measure_script = '''
+import json, sys, time
+start = time.perf_counter()
+import index
+imported = time.perf_counter()
+client = index.app.server.test_client()
+statuses = [client.get(path).status_code for path in {paths!r}]
+answered = time.perf_counter()
+print(json.dumps({{'import_seconds': imported - start, 'first_response_seconds': answered - start,
+                   'statuses': statuses, 'loaded': [m for m in {modules!r} if m in sys.modules]}}))
+'''
+
+
+def measure(repository, work_dir):
+    """
+    :return: dict with import time, time until the first page requests are answered and loaded heavy modules
+    """
+    env = dict(os.environ, PYTHONPATH=repository, JUTRACK_STORAGE=work_dir)
+    env.setdefault('SERVER_PROTOCOL', 'https://')
+    env.setdefault('SERVER_URL', 'example.org')
+    script = measure_script.format(paths=first_requests, modules=heavy_modules)
+    output = subprocess.check_output([sys.executable, '-c', script], env=env, cwd=work_dir, stderr=subprocess.DEVNULL)
+    return json.loads(output.decode('utf-8').strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Cold start benchmark of the dashboard')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--repository', default=repository_folder, help='checkout of the dashboard to measure')
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix='jutrack_startup_')
+    for folder in ('studies', 'users', 'archive'):
+        os.makedirs(os.path.join(work_dir, folder))
+
+    # the first run fills the byte code cache and is not counted
+    measure(args.repository, work_dir)
+    results = [measure(args.repository, work_dir) for _ in range(args.runs)]
+
+    print('import index:   {:.3f} s (median of {} runs)'.format(
+        statistics.median(result['import_seconds'] for result in results), args.runs))
+    print('first response: {:.3f} s'.format(statistics.median(result['first_response_seconds'] for result in results)))
+    print('status codes:   ' + ', '.join(str(status) for status in results[-1]['statuses']))
+    print('heavy modules loaded at startup: ' + (', '.join(results[-1]['loaded']) or 'none'))
+
+
+if __name__ == '__main__':
+    main()
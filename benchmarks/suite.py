@@ -0,0 +1,208 @@
+"""
+Benchmarks of the hot paths of the dashboard at several study sizes. Every study size runs in a fresh process with its
+own storage folder (JUTRACK_STORAGE) and working directory, filled with a synthetic study: study json, study csv,
+user jsons with push tokens and the subject sheets created by the create_subjects benchmark.
+
+Wall time (best of --repeat runs) and peak memory are recorded per benchmark. Results can be saved as baseline and
+later runs compared against it, the exit code is 1 if a benchmark got slower or needs more memory than the tolerance.
+
+    python -m benchmarks.suite --subjects 100 1000 10000 --save-baseline baseline.json
+    python -m benchmarks.suite --subjects 100 1000 10000 --baseline baseline.json
+"""
+import argparse
+import gc
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.memory import reset_peak_rss, get_rss_mb
+
+repository_folder = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+benchmark_names = ['read_study_df', 'get_study_data_table', 'display_study_info_callback', 'create_subjects',
+                   'zip_unused_sheets', 'get_receivers_tokens', 'get_receivers_tokens_indexed']
+# differences below these values are measurement noise and never reported as regression
+min_seconds_difference = 0.02
+min_memory_difference_mb = 5
+
+
+def get_benchmarks(study_id, n_sheets):
+    """
+    :param study_id: synthetic study
+    :param n_sheets: number of subject sheets created by the create_subjects benchmark
+    :return: list of tuples (name, setup, run), setup is called before every run and not measured
+    """
+    from app import dash_study_folder, sheets_folder
+    from study import open_study_json, main
+    from study.create_subjects.create_subjects import create_subjects
+    from study.display_study.StudyDataCache import study_df_cache
+    from study.display_study.UserIndex import user_index
+    from study.display_study.display_callbacks import display_study_info_callback
+    from study.display_study.download_sheets import get_unused_sheets, stream_zip
+    from study.display_study.push_notification import get_receivers_tokens
+    from study.display_study.study_data import read_study_df
+    from study.display_study.study_table import get_study_data_table
+
+    study_json = open_study_json(study_id)
+    receivers = list(read_study_df(study_json).query('app == @main')['id'].astype(str))
+    sheets_path = os.path.join(dash_study_folder, study_id, sheets_folder)
+
+    def clear_study_df_cache():
+        study_df_cache.clear()
+
+    def clear_sheets():
+        shutil.rmtree(sheets_path, ignore_errors=True)
+        os.makedirs(sheets_path)
+
+    def clear_user_index():
+        user_index.clear(study_id)
+
+    def fill_user_index():
+        user_index.refresh(study_id)
+
+    def get_receivers_tokens_refreshed():
+        user_index.refresh_if_changed(study_id)
+        return get_receivers_tokens(receivers, study_id, main)
+
+    return [
+        ('read_study_df', clear_study_df_cache, lambda: read_study_df(study_json)),
+        ('get_study_data_table', None, lambda: get_study_data_table(study_json, read_study_df(study_json))),
+        ('display_study_info_callback', clear_study_df_cache,
+         lambda: display_study_info_callback.__wrapped__(study_id)),
+        ('create_subjects', clear_sheets, lambda: create_subjects(study_id, n_sheets)),
+        ('zip_unused_sheets', None, lambda: sum(len(chunk) for chunk in stream_zip(get_unused_sheets(study_id)))),
+        ('get_receivers_tokens', clear_user_index, get_receivers_tokens_refreshed),
+        ('get_receivers_tokens_indexed', fill_user_index, get_receivers_tokens_refreshed)
+    ]
+
+
+def measure(setup, run, repeat):
+    """
+    :return: dict with the best wall time in seconds, the peak rss and the largest rss increase during a run in MB
+    """
+    result = {'seconds': float('inf'), 'peak_rss_mb': 0, 'rss_increase_mb': 0}
+    for _ in range(repeat):
+        if setup:
+            setup()
+        gc.collect()
+        reset_peak_rss()
+        start_rss = get_rss_mb('VmRSS')
+        start = time.perf_counter()
+        run()
+        result['seconds'] = min(result['seconds'], time.perf_counter() - start)
+        peak_rss = get_rss_mb()
+        result['peak_rss_mb'] = max(result['peak_rss_mb'], peak_rss)
+        result['rss_increase_mb'] = max(result['rss_increase_mb'], peak_rss - start_rss)
+    return result
+
+
+def run_scale(n_subjects, n_sheets, repeat, names):
+    """
+    Writes the synthetic study into the storage folder of the current process and runs the benchmarks
+
+    :return: dict of results per benchmark name
+    """
+    from app import studies_folder, users_folder, csv_prefix, storage_folder
+    from benchmarks.synthetic_study import get_synthetic_study_json, generate_study_df, generate_user_jsons, \
+        write_user_jsons
+
+    study_id = 'BENCH' + str(n_subjects)
+    os.makedirs(os.path.join(studies_folder, study_id), exist_ok=True)
+    with open(os.path.join(studies_folder, study_id, study_id + '.json'), 'w') as f:
+        json.dump(get_synthetic_study_json(study_id, n_subjects), f)
+    # half of the subjects registered, the sheets of the others are zipped by zip_unused_sheets
+    study_df = generate_study_df(study_id, n_subjects, enrolled_ratio=0.5)
+    study_df.to_csv(os.path.join(storage_folder, csv_prefix + study_id + '.csv'), index=False)
+    write_user_jsons(users_folder, study_id, generate_user_jsons(study_df))
+
+    results = {}
+    for name, setup, run in get_benchmarks(study_id, n_sheets):
+        if name in names:
+            results[name] = measure(setup, run, repeat)
+    return results
+
+
+def run_in_subprocess(data_dir, n_subjects, n_sheets, repeat, names):
+    storage = os.path.join(data_dir, str(n_subjects), 'storage')
+    work = os.path.join(data_dir, str(n_subjects), 'work')
+    shutil.rmtree(os.path.join(data_dir, str(n_subjects)), ignore_errors=True)
+    for folder in (os.path.join(storage, 'studies'), os.path.join(storage, 'users'), work):
+        os.makedirs(folder)
+
+    env = dict(os.environ, JUTRACK_STORAGE=storage,
+               PYTHONPATH=os.pathsep.join(filter(None, [repository_folder, os.environ.get('PYTHONPATH')])))
+    env.setdefault('SERVER_PROTOCOL', 'https://')
+    env.setdefault('SERVER_URL', 'example.org')
+    output = subprocess.check_output([sys.executable, '-m', 'benchmarks.suite', '--run-scale', str(n_subjects),
+                                      str(n_sheets), str(repeat)] + names, env=env, cwd=work)
+    return json.loads(output.decode('utf-8').strip().splitlines()[-1])
+
+
+def compare(results, baseline, tolerance):
+    """
+    :param results: dict of results per study size and benchmark
+    :param baseline: results of an earlier run
+    :param tolerance: allowed relative increase of time and memory
+    :return: list of regression messages
+    """
+    regressions = []
+    for scale, results_per_benchmark in results.items():
+        for name, result in results_per_benchmark.items():
+            base = baseline.get(scale, {}).get(name)
+            if base is None:
+                continue
+            if result['seconds'] > base['seconds'] * (1 + tolerance) + min_seconds_difference:
+                regressions.append('{} ({} subjects): {:.3f} s instead of {:.3f} s'.format(
+                    name, scale, result['seconds'], base['seconds']))
+            if result['rss_increase_mb'] > base['rss_increase_mb'] * (1 + tolerance) + min_memory_difference_mb:
+                regressions.append('{} ({} subjects): {:.1f} MB instead of {:.1f} MB'.format(
+                    name, scale, result['rss_increase_mb'], base['rss_increase_mb']))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark suite of the dashboard')
+    parser.add_argument('--subjects', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--max-sheets', type=int, default=200,
+                        help='subject sheets created per study size, creating sheets is slow')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--benchmarks', nargs='+', default=benchmark_names, choices=benchmark_names)
+    parser.add_argument('--data-dir', default=os.path.join(tempfile.gettempdir(), 'jutrack_benchmarks', 'suite'))
+    parser.add_argument('--baseline', help='json file of an earlier run to compare with')
+    parser.add_argument('--save-baseline', help='json file the results are written to')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    parser.add_argument('--run-scale', nargs=3, type=int, help=argparse.SUPPRESS)
+    args, names = parser.parse_known_args()
+
+    if args.run_scale:
+        print(json.dumps(run_scale(*args.run_scale, names=names)))
+        return
+
+    results = {}
+    print('{:>9} {:<30} {:>9} {:>13} {:>15}'.format('subjects', 'benchmark', 'seconds', 'peak rss MB', 'rss increase MB'))
+    for n_subjects in args.subjects:
+        n_sheets = min(n_subjects, args.max_sheets)
+        results[str(n_subjects)] = run_in_subprocess(args.data_dir, n_subjects, n_sheets, args.repeat, args.benchmarks)
+        for name, result in results[str(n_subjects)].items():
+            print('{:>9} {:<30} {:>9.3f} {:>13.1f} {:>15.1f}'.format(n_subjects, name, result['seconds'],
+                                                                     result['peak_rss_mb'], result['rss_increase_mb']))
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump(results, f, indent=4)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print('Regression: ' + regression)
+        if regressions:
+            sys.exit(1)
+        print('No regressions compared to ' + args.baseline)
+
+
+if __name__ == '__main__':
+    main()
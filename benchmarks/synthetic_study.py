@@ -0,0 +1,160 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from study import table_columns, sensors_per_modality_dict, suffix_per_modality_dict, main, ema, timestamp_format, \
+    max_subjects_exp
+
+
+def get_synthetic_study_json(study_id, n_subjects, sensor_list=None, survey=True, duration=30):
+    """
+    Study json as created by create_study
+
+    :param study_id: study name
+    :param n_subjects: number of subjects
+    :param sensor_list: sensors of the study, all main sensors if None
+    :param survey: whether the study has the ema modality
+    :param duration: study duration in days
+    :return: study json
+    """
+    study_json = {
+        'name': study_id,
+        'duration': duration,
+        'number-of-subjects': n_subjects,
+        'description': 'Synthetic study',
+        'enrolled-subjects': [],
+        'frequency': 50,
+        'sensor-list': list(sensors_per_modality_dict[main]) if sensor_list is None else list(sensor_list),
+        'active_labeling': 0
+    }
+    if survey:
+        study_json['survey'] = {'questions': []}
+    return study_json
+
+
+def generate_study_df(study_id, n_subjects, activations=2, ema_ratio=0.5, missing_ratio=0.1, left_ratio=0.3,
+                      max_days=60, enrolled_ratio=1.0, seed=0):
+    """
+    Generates the content of a jutrack_dashboard_<study>.csv. Every subject registers the main app with the given number
+    of qr code activations, a share of the subjects additionally registers the ema app.
+
+    :param study_id: study name
+    :param n_subjects: number of subjects
+    :param activations: qr code activations per subject and app
+    :param ema_ratio: share of subjects also using the ema app
+    :param missing_ratio: share of sensor cells without any received data
+    :param left_ratio: share of registrations which already left the study
+    :param max_days: maximum days since registration
+    :param enrolled_ratio: share of the subjects 1 to n_subjects which registered, the sheets of the others are unused
+    :param seed: random seed
+    :return: data frame with the columns of table_columns
+    """
+    rng = np.random.default_rng(seed)
+    subjects = np.arange(1, n_subjects + 1)
+    if enrolled_ratio < 1:
+        subjects = subjects[rng.random(n_subjects) < enrolled_ratio]
+    ema_subjects = subjects[rng.random(len(subjects)) < ema_ratio]
+    subject_numbers = np.concatenate([np.repeat(subjects, activations), np.repeat(ema_subjects, activations)])
+    activation_numbers = np.concatenate([np.tile(np.arange(1, activations + 1), len(subjects)),
+                                         np.tile(np.arange(1, activations + 1), len(ema_subjects))])
+    apps = np.concatenate([np.full(len(subjects) * activations, main), np.full(len(ema_subjects) * activations, ema)])
+    n_rows = len(subject_numbers)
+
+    subject_names = pd.Series(subject_numbers).astype(str).str.zfill(max_subjects_exp)
+    now = pd.Timestamp.now().floor('s')
+    registered = now - pd.Series(pd.to_timedelta(rng.integers(0, max_days * 86400, n_rows), unit='s'))
+    has_left = rng.random(n_rows) < left_ratio
+    left = (registered + (now - registered) * rng.random(n_rows)).dt.floor('s')
+    last_possible = left.where(has_left, now)
+    left = left.where(has_left)
+
+    study_df = pd.DataFrame({
+        'subject_name': study_id + '_' + subject_names + '_' + activation_numbers.astype(str),
+        'app': apps,
+        'device_id': 'device_' + subject_names,
+        'date_registered': format_timestamps(registered),
+        'date_left_study': format_timestamps(left),
+        'time_in_study': (last_possible - registered).dt.floor('s').astype(str),
+        'status_code': np.where(has_left, rng.integers(1, 4, n_rows), 0)
+    })
+
+    for modality, sensors in sensors_per_modality_dict.items():
+        for sensor in sensors:
+            has_data = (apps == modality) & (rng.random(n_rows) >= missing_ratio)
+            received = registered + (last_possible - registered) * rng.random(n_rows)
+            study_df[sensor + ' n_batches'] = np.where(has_data, rng.integers(1, 5000, n_rows), 0)
+            study_df[sensor + ' last_time_received'] = format_timestamps(received.dt.floor('s').where(has_data))
+
+    return study_df[table_columns]
+
+
+def format_timestamps(timestamps):
+    return timestamps.dt.strftime(timestamp_format).fillna('none')
+
+
+def generate_user_jsons(study_df, token_ratio=0.9, invalid_ratio=0.05, seed=0):
+    """
+    Generates the user jsons the backend writes for every activated qr code: push tokens of the registered apps, status
+    and the time the subject left the study
+
+    :param study_df: data frame returned by generate_study_df
+    :param token_ratio: share of registrations with a push token
+    :param invalid_ratio: share of push tokens already marked as invalid
+    :param seed: random seed
+    :return: dict of user json per qr code id
+    """
+    rng = np.random.default_rng(seed)
+    user_jsons = {}
+    has_token = rng.random(len(study_df.index)) < token_ratio
+    is_invalid = rng.random(len(study_df.index)) < invalid_ratio
+    left = pd.to_datetime(study_df['date_left_study'].replace('none', np.nan), format=timestamp_format)
+
+    for i, (receiver, app, status, time_left) in enumerate(zip(study_df['subject_name'], study_df['app'],
+                                                                study_df['status_code'], left)):
+        suffix = suffix_per_modality_dict[app]
+        user_json = user_jsons.setdefault(receiver, {})
+        user_json['status' + suffix] = int(status)
+        if not pd.isna(time_left):
+            user_json['time_left' + suffix] = int(time_left.timestamp() * 1000)
+        if has_token[i]:
+            token = 'token_' + app + '_' + receiver
+            user_json['pushNotification_token' + suffix] = token
+            if is_invalid[i]:
+                user_json['pushNotification_token' + suffix + '_invalid'] = token
+    return user_jsons
+
+
+def write_user_jsons(users_folder, study_id, user_jsons):
+    """
+    Writes user jsons as <users_folder>/<study>_<qr code id>.json
+
+    :return:
+    """
+    os.makedirs(users_folder, exist_ok=True)
+    for receiver, user_json in user_jsons.items():
+        with open(os.path.join(users_folder, study_id + '_' + receiver + '.json'), 'w') as f:
+            json.dump(user_json, f)
+
+
+def write_synthetic_study(folder, study_id, n_subjects, sensor_list=None, **kwargs):
+    """
+    Writes study csv and study json of a synthetic study to the given folder. Existing files are reused.
+    Like the csv files written by the backend, the csv contains the columns of all sensors.
+
+    :param folder: target folder
+    :param study_id: study name
+    :param n_subjects: number of subjects
+    :param sensor_list: sensors selected in the study json, all main sensors if None
+    :param kwargs: further arguments of generate_study_df
+    :return: path of the study csv and the study json
+    """
+    os.makedirs(folder, exist_ok=True)
+    study_csv = os.path.join(folder, 'jutrack_dashboard_' + study_id + '.csv')
+    study_json = get_synthetic_study_json(study_id, n_subjects, sensor_list=sensor_list)
+    if not os.path.isfile(study_csv):
+        generate_study_df(study_id, n_subjects, **kwargs).to_csv(study_csv, index=False)
+    with open(os.path.join(folder, study_id + '.json'), 'w') as f:
+        json.dump(study_json, f)
+    return study_csv, study_json
@@ -5,6 +5,13 @@ class EmptyStudyTableException(BaseException):
     pass
 
 
+class InvalidSurveyException(BaseException):
+    """
+    Exception if the uploaded EMA survey is no valid json
+    """
+    pass
+
+
 class MissingCredentialsException(BaseException):
     """
     Exception if credentials are missing
@@ -12,6 +19,13 @@ class MissingCredentialsException(BaseException):
     pass
 
 
+class MissingSecretKeyException(BaseException):
+    """
+    Exception if the key signing the session cookies is not configured or could not be read
+    """
+    pass
+
+
 class NoSuchUserException(BaseException):
     """
     Exception if entered login username does not exist
@@ -33,6 +47,20 @@ class StudyCsvMissingException(BaseException):
     pass
 
 
+class UploadNotFoundException(BaseException):
+    """
+    Exception if an upload does not exist or was not completed
+    """
+    pass
+
+
+class UploadTooLargeException(BaseException):
+    """
+    Exception if an upload exceeds its announced size or the maximum upload size
+    """
+    pass
+
+
 class WrongPasswordException(BaseException):
     """
     Exception if password for existing user is wrong
@@ -9,10 +9,13 @@ from study.close_study.layout import get_close_study_div
 from study.create_study.layout import get_create_study_div
 from study.display_study.layout import get_current_studies_div
 
+from jobs import job_callbacks
+from monitoring import metrics_callbacks, profile_callbacks
 from security import login_callbacks
 from study.close_study import close_callbacks
 from study.create_study import create_callbacks
 from study.display_study import display_callbacks
+from uploads import upload_callbacks
 
 
 @app.callback(Output('content-div', 'children'),
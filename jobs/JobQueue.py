@@ -0,0 +1,153 @@
+import json
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from app import jobs_folder, job_workers
+
+logger = logging.getLogger(__name__)
+
+queued = 'queued'
+running = 'running'
+done = 'done'
+failed = 'failed'
+interrupted = 'interrupted'
+
+# progress of a running job is written to its file at most once per interval (seconds)
+job_save_interval = 1
+# files of finished jobs are removed after this many seconds
+job_retention = 7 * 24 * 60 * 60
+
+
+class JobQueue:
+    """
+    In-process queue running long dashboard actions (creating subjects, sending push notifications) in a pool of
+    worker threads. The state of every job is stored as json in the jobs folder, so the progress can also be read by
+    other dashboard processes and remains available after a restart. The folder is created and old jobs are removed
+    when the first job is submitted.
+    """
+
+    def __init__(self, folder, workers):
+        self.folder = folder
+        self.workers = workers
+        self.jobs = {}
+        self.last_saved = {}
+        self.lock = threading.Lock()
+        self.executor = None
+
+    def submit(self, name, func, *args):
+        """
+        Queues a job. The function is called with the given arguments and the keyword argument progress, a function
+        taking the number of finished items and optionally the total number of items.
+
+        :param name: name of the job which is displayed with its progress
+        :param func: function executing the job, its return value is stored as result and must be json serializable
+        :param args: arguments of the function
+        :return: job id
+        """
+        job_id = uuid.uuid4().hex
+        job = {'id': job_id, 'name': name, 'status': queued, 'done': 0, 'total': None, 'result': None, 'error': None,
+               'pid': os.getpid(), 'created': time.time(), 'started': None, 'finished': None}
+        with self.lock:
+            if self.executor is None:
+                os.makedirs(self.folder, exist_ok=True)
+                self.remove_old_jobs()
+            self.jobs[job_id] = job
+            self.save(job)
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='job')
+            self.executor.submit(self.run, job_id, func, args)
+        return job_id
+
+    def run(self, job_id, func, args):
+        self.update(job_id, status=running, started=time.time())
+        try:
+            result = func(*args, progress=lambda done_items, total=None: self.set_progress(job_id, done_items, total))
+            self.update(job_id, status=done, result=result, finished=time.time())
+        except Exception as e:
+            logger.exception('Job %s failed', job_id)
+            self.update(job_id, status=failed, error=str(e), finished=time.time())
+
+    def set_progress(self, job_id, done_items, total=None):
+        with self.lock:
+            job = self.jobs[job_id]
+            job['done'] = done_items
+            if total is not None:
+                job['total'] = total
+            if time.time() - self.last_saved.get(job_id, 0) >= job_save_interval:
+                self.save(job)
+
+    def update(self, job_id, **values):
+        with self.lock:
+            job = self.jobs[job_id]
+            job.update(values)
+            self.save(job)
+            if job['status'] in (done, failed):
+                del self.jobs[job_id]
+                self.last_saved.pop(job_id, None)
+
+    def save(self, job):
+        job_path = self.get_path(job['id'])
+        with open(job_path + '.tmp', 'w') as f:
+            json.dump(job, f)
+        os.replace(job_path + '.tmp', job_path)
+        self.last_saved[job['id']] = time.time()
+
+    def get_path(self, job_id):
+        return os.path.join(self.folder, job_id + '.json')
+
+    def get_job(self, job_id):
+        """
+        :param job_id: job id
+        :return: copy of the job state extended by the rate (items per second) and the eta (seconds), None if the job
+                 does not exist
+        """
+        if not re.fullmatch('[0-9a-f]{32}', str(job_id)):
+            return None
+        with self.lock:
+            job = dict(self.jobs[job_id]) if job_id in self.jobs else None
+        if job is None:
+            try:
+                with open(self.get_path(job_id)) as f:
+                    job = json.load(f)
+            except (FileNotFoundError, ValueError):
+                return None
+            if job['status'] in (queued, running) and not is_process_alive(job['pid']):
+                job['status'] = interrupted
+
+        job['rate'], job['eta'] = get_rate_and_eta(job)
+        return job
+
+    def remove_old_jobs(self):
+        for entry in os.scandir(self.folder):
+            if entry.name.endswith('.json') and entry.stat().st_mtime < time.time() - job_retention:
+                os.remove(entry.path)
+
+
+def get_rate_and_eta(job):
+    """
+    :param job: job state
+    :return: finished items per second and estimated seconds until the job is finished, None if unknown
+    """
+    if job['status'] != running or not job['started'] or not job['done']:
+        return None, None
+    rate = job['done'] / max(time.time() - job['started'], 1e-6)
+    eta = (job['total'] - job['done']) / rate if job['total'] else None
+    return rate, eta
+
+
+def is_process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+job_queue = JobQueue(jobs_folder, job_workers)
@@ -0,0 +1,45 @@
+from dash.dependencies import Output, Input, State, MATCH
+from dash.exceptions import PreventUpdate
+from flask import jsonify, abort
+
+from app import app, user
+from jobs.JobQueue import job_queue
+from jobs.layout import get_job_progress_children, is_job_finished
+
+# roles which submit jobs and may see their progress
+job_roles = ('master', 'invest')
+
+
+@app.callback([Output({'type': 'job-progress', 'job': MATCH}, 'children'),
+               Output({'type': 'job-progress-interval', 'job': MATCH}, 'disabled')],
+              [Input({'type': 'job-progress-interval', 'job': MATCH}, 'n_intervals')],
+              [State({'type': 'job-progress-interval', 'job': MATCH}, 'id')])
+def update_job_progress_callback(n_intervals, interval_id):
+    """
+    Callback polling the progress of a job, the polling stops as soon as the job ended
+
+    :param n_intervals: not used
+    :param interval_id: id of the interval containing the job id
+    :return: job progress and whether the interval is disabled
+    """
+    if not n_intervals:
+        raise PreventUpdate
+    job = job_queue.get_job(interval_id['job']) if user.role in job_roles else None
+    return get_job_progress_children(job), is_job_finished(job)
+
+
+@app.server.route('/jobs/<string:job_id>')
+def get_job_progress(job_id):
+    """
+    Progress of a job as json containing status, done and total items, rate and eta. Only available for the roles
+    which submit jobs.
+
+    :param job_id: id of the job
+    :return: json response, 403 if the user is not allowed to see jobs, 404 if the job does not exist
+    """
+    if user.role not in job_roles:
+        abort(403)
+    job = job_queue.get_job(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job)
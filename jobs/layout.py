@@ -0,0 +1,54 @@
+import dash_html_components as html
+import dash_core_components as dcc
+
+from jobs.JobQueue import job_queue, queued, running, done, failed, interrupted
+
+# milliseconds between two progress requests of the browser
+job_poll_interval = 1000
+
+
+def get_job_progress_div(job_id):
+    """
+    Returns a div displaying the progress of a job, it is updated by update_job_progress_callback until the job ended
+
+    :param job_id: id of the job
+    :return: job progress div
+    """
+    return html.Div(className='job-progress', children=[
+        dcc.Interval(id={'type': 'job-progress-interval', 'job': job_id}, interval=job_poll_interval),
+        html.Div(id={'type': 'job-progress', 'job': job_id}, children=get_job_progress_children(job_queue.get_job(job_id)))
+    ])
+
+
+def get_job_progress_children(job):
+    """
+    :param job: job state as returned by job_queue.get_job
+    :return: list of html elements describing the state of the job
+    """
+    if job is None:
+        return ['Job not found.']
+
+    if job['status'] == queued:
+        return [job['name'] + ': waiting...']
+    if job['status'] == running:
+        progress = job['name'] + ': ' + str(job['done'])
+        if job['total']:
+            progress += ' of ' + str(job['total'])
+        if job['rate']:
+            progress += ' ({:.1f}/s'.format(job['rate'])
+            progress += ', about {:.0f} s left)'.format(job['eta']) if job['eta'] is not None else ')'
+        return [progress, html.Progress(value=str(job['done']), max=str(job['total']))] if job['total'] else [progress]
+    if job['status'] == done:
+        children = [job['name'] + ': finished!']
+        for message in job['result'] or []:
+            children.extend([html.Br(), message])
+        return children
+    if job['status'] == failed:
+        return [job['name'] + ' failed: ' + job['error']]
+    if job['status'] == interrupted:
+        return [job['name'] + ' was interrupted by a restart of the dashboard.']
+    return ['']
+
+
+def is_job_finished(job):
+    return job is None or job['status'] not in (queued, running)
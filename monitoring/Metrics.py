@@ -0,0 +1,110 @@
+import math
+import threading
+
+# upper bounds of the histogram buckets
+latency_buckets = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+size_buckets = (100, 1000, 10000, 100000, 1000000, 10000000, 100000000)
+
+
+class Histogram:
+    """
+    Cumulative histogram with fixed buckets as used by Prometheus
+    """
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+
+    def observe(self, value):
+        index = 0
+        while index < len(self.buckets) and value > self.buckets[index]:
+            index += 1
+        self.counts[index] += 1
+        self.sum += value
+
+    def get_lines(self, name, labels):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (math.inf,), self.counts):
+            cumulative += count
+            lines.append(name + '_bucket' + format_labels(labels + [('le', format_value(bound))]) + ' ' + str(cumulative))
+        lines.append(name + '_sum' + format_labels(labels) + ' ' + format_value(self.sum))
+        lines.append(name + '_count' + format_labels(labels) + ' ' + str(cumulative))
+        return lines
+
+
+class Metrics:
+    """
+    Latency, response size, error and in-flight metrics per handler (dash callback or flask route) of one dashboard
+    process, exported in the Prometheus text format
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latency = {}
+        self.size = {}
+        self.errors = {}
+        self.in_flight = {}
+
+    def start(self, handler):
+        with self.lock:
+            self.in_flight[handler] = self.in_flight.get(handler, 0) + 1
+
+    def finish(self, handler):
+        with self.lock:
+            self.in_flight[handler] -= 1
+
+    def observe_latency(self, handler, seconds, error=False):
+        with self.lock:
+            self.latency.setdefault(handler, Histogram(latency_buckets)).observe(seconds)
+            if error:
+                self.errors[handler] = self.errors.get(handler, 0) + 1
+
+    def observe_size(self, handler, size):
+        with self.lock:
+            self.size.setdefault(handler, Histogram(size_buckets)).observe(size)
+
+    def get_text(self):
+        """
+        :return: all metrics in the Prometheus text exposition format
+        """
+        with self.lock:
+            lines = ['# HELP dashboard_request_duration_seconds Time until the response of a callback or route is ready',
+                     '# TYPE dashboard_request_duration_seconds histogram']
+            for handler, histogram in sorted(self.latency.items()):
+                lines.extend(histogram.get_lines('dashboard_request_duration_seconds', list(handler)))
+
+            lines.extend(['# HELP dashboard_response_size_bytes Size of the response body',
+                          '# TYPE dashboard_response_size_bytes histogram'])
+            for handler, histogram in sorted(self.size.items()):
+                lines.extend(histogram.get_lines('dashboard_response_size_bytes', list(handler)))
+
+            lines.extend(['# HELP dashboard_request_errors_total Requests answered with a server error',
+                          '# TYPE dashboard_request_errors_total counter'])
+            for handler in sorted(self.latency):
+                lines.append('dashboard_request_errors_total' + format_labels(list(handler)) + ' ' +
+                             str(self.errors.get(handler, 0)))
+
+            lines.extend(['# HELP dashboard_requests_in_flight Requests currently being processed',
+                          '# TYPE dashboard_requests_in_flight gauge'])
+            for handler, count in sorted(self.in_flight.items()):
+                lines.append('dashboard_requests_in_flight' + format_labels(list(handler)) + ' ' + str(count))
+        return '\n'.join(lines) + '\n'
+
+
+def format_labels(labels):
+    return '{' + ','.join(name + '="' + escape_label_value(value) + '"' for name, value in labels) + '}'
+
+
+def escape_label_value(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+metrics = Metrics()
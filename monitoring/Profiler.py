@@ -0,0 +1,227 @@
+import cProfile
+import functools
+import io
+import json
+import os
+import random
+import re
+import threading
+import time
+import tracemalloc
+import uuid
+
+from app import profiles_folder, profile_ring_size, profile_targets, profile_sample_rate, profile_mode
+
+cprofile = 'cprofile'
+tracemalloc_mode = 'tracemalloc'
+# number of allocation sites written to a tracemalloc profile and frames stored per allocation
+tracemalloc_top_stats = 50
+tracemalloc_frames = 10
+profile_modes = (cprofile, tracemalloc_mode)
+# seconds between two checks of the settings file, settings changed at runtime reach every dashboard process
+profile_settings_check_interval = 1
+
+
+class Profiler:
+    """
+    Opt-in profiling of dash callbacks and functions decorated with profiled. A call is profiled if one of its keys (the
+    callback id or one of its outputs, e.g. 'study-data-table.data', or the function name) is one of the targets ('*'
+    for all) or with the sample rate. Profiles are cProfile stats (.prof, readable with pstats or snakeviz) or
+    tracemalloc allocation differences (.txt) and are kept in a ring of at most max_profiles files.
+    Targets, sample rate and mode start with the configured values and can be changed at runtime (see set_settings),
+    the changed settings are stored in the profiles folder and picked up by all dashboard processes.
+    """
+
+    def __init__(self, folder, max_profiles, targets, sample_rate, mode):
+        self.folder = folder
+        self.max_profiles = max_profiles
+        self.settings_path = os.path.join(folder, 'settings.json')
+        self.settings_mtime_ns = None
+        self.last_settings_check = 0
+        self.apply_settings(targets, sample_rate, mode)
+        self.current = threading.local()
+        self.tracemalloc_lock = threading.Lock()
+        self.ring_lock = threading.Lock()
+
+    def is_active(self):
+        """
+        :return: whether any call can be profiled, the settings file is checked at most once per check interval
+        """
+        now = time.monotonic()
+        if now - self.last_settings_check >= profile_settings_check_interval:
+            self.last_settings_check = now
+            self.load_settings()
+        return self.active
+
+    def apply_settings(self, targets, sample_rate, mode):
+        self.targets = set(targets)
+        self.sample_rate = sample_rate
+        self.mode = mode
+        self.active = bool(self.targets) or self.sample_rate > 0
+
+    def load_settings(self):
+        """
+        Applies the settings file if it changed, profiling is turned off if the file does not contain valid settings
+        """
+        try:
+            mtime_ns = os.stat(self.settings_path).st_mtime_ns
+            if mtime_ns == self.settings_mtime_ns:
+                return
+            with open(self.settings_path) as f:
+                settings = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError):
+            settings = None
+        self.settings_mtime_ns = mtime_ns
+        try:
+            self.apply_settings(*get_valid_settings(settings))
+        except ValueError:
+            self.apply_settings([], 0, cprofile)
+
+    def get_settings(self):
+        return {'targets': sorted(self.targets), 'sample_rate': self.sample_rate, 'mode': self.mode}
+
+    def set_settings(self, targets, sample_rate, mode):
+        """
+        Changes the settings of all dashboard processes. Raises ValueError if the settings are invalid.
+
+        :param targets: list of callback ids, callback outputs or function names, '*' for all
+        :param sample_rate: share of the calls which are profiled, between 0 and 1
+        :param mode: cprofile or tracemalloc
+        :return:
+        """
+        self.apply_settings(*get_valid_settings({'targets': targets, 'sample_rate': sample_rate, 'mode': mode}))
+        os.makedirs(self.folder, exist_ok=True)
+        with open(self.settings_path + '.tmp', 'w') as f:
+            json.dump(self.get_settings(), f)
+        os.replace(self.settings_path + '.tmp', self.settings_path)
+        self.settings_mtime_ns = os.stat(self.settings_path).st_mtime_ns
+
+    def should_profile(self, keys):
+        if '*' in self.targets or any(key in self.targets for key in keys):
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def call(self, name, keys, func, args, kwargs):
+        """
+        Calls the function, profiled if selected. Calls nested in a profiled call of the same thread are not profiled
+        separately.
+
+        :param name: name used in the file name of the profile
+        :param keys: keys matched against the targets
+        """
+        if getattr(self.current, 'name', None) or not self.should_profile(keys):
+            return func(*args, **kwargs)
+
+        self.current.name = name
+        try:
+            if self.mode == tracemalloc_mode:
+                return self.call_tracemalloc(name, func, args, kwargs)
+            return self.call_cprofile(name, func, args, kwargs)
+        finally:
+            self.current.name = None
+
+    def call_cprofile(self, name, func, args, kwargs):
+        profile = cProfile.Profile()
+        start = time.perf_counter()
+        try:
+            return profile.runcall(func, *args, **kwargs)
+        finally:
+            path = self.get_profile_path(name, time.perf_counter() - start, '.prof')
+            profile.dump_stats(path)
+            self.trim()
+
+    def call_tracemalloc(self, name, func, args, kwargs):
+        # tracemalloc traces all threads, only one call is traced at a time
+        if not self.tracemalloc_lock.acquire(blocking=False):
+            return func(*args, **kwargs)
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start(tracemalloc_frames)
+        try:
+            before = tracemalloc.take_snapshot()
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                seconds = time.perf_counter() - start
+                after = tracemalloc.take_snapshot()
+                _, peak = tracemalloc.get_traced_memory()
+                report = io.StringIO()
+                report.write('{} took {:.3f} s, traced peak {:.1f} MB\n\n'.format(name, seconds, peak / 1024 ** 2))
+                for stat in after.compare_to(before, 'traceback')[:tracemalloc_top_stats]:
+                    report.write(str(stat) + '\n')
+                    report.write('\n'.join('    ' + line for line in stat.traceback.format(most_recent_first=True)) + '\n')
+                with open(self.get_profile_path(name, seconds, '.txt'), 'w') as f:
+                    f.write(report.getvalue())
+                self.trim()
+        finally:
+            if started:
+                tracemalloc.stop()
+            self.tracemalloc_lock.release()
+
+    def get_profile_path(self, name, seconds, extension):
+        os.makedirs(self.folder, exist_ok=True)
+        # callback ids contain characters which are not allowed in file names
+        name = re.sub(r'[^A-Za-z0-9_.-]+', '-', name).strip('-.')[:80]
+        file_name = '{}_{}_{}ms_{}{}'.format(time.strftime('%Y%m%d-%H%M%S'), name, int(seconds * 1000),
+                                             uuid.uuid4().hex[:8], extension)
+        return os.path.join(self.folder, file_name)
+
+    def trim(self):
+        """
+        Removes the oldest profiles exceeding max_profiles
+
+        :return:
+        """
+        with self.ring_lock:
+            profiles = self.get_profiles()
+            for profile in profiles[:max(len(profiles) - self.max_profiles, 0)]:
+                try:
+                    os.remove(os.path.join(self.folder, profile['name']))
+                except FileNotFoundError:
+                    pass
+
+    def get_profiles(self):
+        """
+        :return: list of dicts with name, size and modification time of the stored profiles, oldest first
+        """
+        if not os.path.isdir(self.folder):
+            return []
+        profiles = [{'name': entry.name, 'size': entry.stat().st_size, 'time': entry.stat().st_mtime}
+                    for entry in os.scandir(self.folder) if entry.name.endswith(('.prof', '.txt'))]
+        return sorted(profiles, key=lambda profile: (profile['time'], profile['name']))
+
+
+profiler = Profiler(profiles_folder, profile_ring_size, profile_targets, profile_sample_rate, profile_mode)
+
+
+def get_valid_settings(settings):
+    """
+    :param settings: dict with targets, sample_rate and mode
+    :return: targets, sample rate and mode, raises ValueError if one of them is missing or invalid
+    """
+    if not isinstance(settings, dict):
+        raise ValueError
+    targets, sample_rate, mode = settings.get('targets'), settings.get('sample_rate'), settings.get('mode')
+    if not isinstance(targets, list) or not all(isinstance(target, str) for target in targets):
+        raise ValueError
+    if isinstance(sample_rate, bool) or not isinstance(sample_rate, (int, float)) or not 0 <= sample_rate <= 1:
+        raise ValueError
+    if mode not in profile_modes:
+        raise ValueError
+    return targets, sample_rate, mode
+
+
+def profiled(func):
+    """
+    Decorator making a function selectable for profiling by its name. As long as profiling is not active the wrapper
+    only checks a flag. Dash callbacks do not need the decorator, they are selected by their id (see profile_callbacks).
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not profiler.is_active():
+            return func(*args, **kwargs)
+        return profiler.call(func.__name__, [func.__name__], func, args, kwargs)
+    return wrapper
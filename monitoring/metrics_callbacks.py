@@ -0,0 +1,73 @@
+import time
+
+from flask import g, request, Response
+
+from app import app, metrics_enabled
+from monitoring.Metrics import metrics
+
+dash_callback_path = '/_dash-update-component'
+# static files of dash and the assets folder are not measured
+excluded_path_prefixes = ('/_dash-component-suites/', '/assets/', '/_favicon.ico', '/metrics')
+
+
+def get_handler():
+    """
+    :return: labels of the handler of the current request, the output of dash callbacks and the url rule of routes. None
+             if the request is not measured.
+    """
+    if request.path == dash_callback_path:
+        body = request.get_json(silent=True) or {}
+        return ('kind', 'callback'), ('handler', str(body.get('output', '')))
+    if request.url_rule is None or request.path.startswith(excluded_path_prefixes):
+        return None
+    return ('kind', 'route'), ('handler', request.url_rule.rule)
+
+
+def start_measurement():
+    handler = get_handler()
+    if handler:
+        g.metrics_handler = handler
+        g.metrics_start = time.perf_counter()
+        metrics.start(handler)
+
+
+def finish_measurement(response):
+    handler = g.get('metrics_handler')
+    if handler:
+        metrics.observe_latency(handler, time.perf_counter() - g.metrics_start, error=response.status_code >= 500)
+        if response.content_length is not None:
+            metrics.observe_size(handler, response.content_length)
+        elif response.is_streamed:
+            # the size of streamed responses is known after the last chunk was sent
+            response.response = count_bytes(response.response, handler)
+    return response
+
+
+def end_request(exception):
+    handler = g.pop('metrics_handler', None)
+    if handler:
+        metrics.finish(handler)
+
+
+def count_bytes(chunks, handler):
+    size = 0
+    try:
+        for chunk in chunks:
+            size += len(chunk)
+            yield chunk
+    finally:
+        metrics.observe_size(handler, size)
+        if hasattr(chunks, 'close'):
+            chunks.close()
+
+
+def get_metrics():
+    return Response(metrics.get_text(), mimetype='text/plain; version=0.0.4')
+
+
+# without METRICS=1 no hook is registered, requests are not slowed down at all
+if metrics_enabled:
+    app.server.before_request(start_measurement)
+    app.server.after_request(finish_measurement)
+    app.server.teardown_request(end_request)
+    app.server.add_url_rule('/metrics', 'metrics', get_metrics)
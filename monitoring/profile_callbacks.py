@@ -0,0 +1,87 @@
+import functools
+import os
+
+from flask import jsonify, send_from_directory, abort, request
+
+from app import app, user
+from monitoring.Profiler import profiler
+from monitoring.metrics_callbacks import dash_callback_path
+
+
+def get_callback_keys(callback_id):
+    """
+    :param callback_id: output of a dash callback, '..<id>.<prop>...<id>.<prop>..' if it has several outputs
+    :return: callback id and its single outputs, matched against the profiling targets
+    """
+    if callback_id.startswith('..') and callback_id.endswith('..'):
+        return [callback_id] + callback_id[2:-2].split('...')
+    return [callback_id]
+
+
+def profile_callbacks(dispatch):
+    """
+    Wraps the view dispatching all dash callbacks, so callbacks are selected for profiling by their id. As long as
+    profiling is not active only a flag is checked.
+    """
+    @functools.wraps(dispatch)
+    def wrapper(*args, **kwargs):
+        if not profiler.is_active():
+            return dispatch(*args, **kwargs)
+        callback_id = str((request.get_json(silent=True) or {}).get('output', ''))
+        return profiler.call(callback_id, get_callback_keys(callback_id), dispatch, args, kwargs)
+    return wrapper
+
+
+# dash registers the view with its path as endpoint
+app.server.view_functions[dash_callback_path] = profile_callbacks(app.server.view_functions[dash_callback_path])
+
+
+@app.server.route('/admin/profiles')
+def list_profiles():
+    """
+    Stored profiles, newest first. Only available for the role master.
+
+    :return: json list with name, size, time and download url of every profile
+    """
+    if user.role != 'master':
+        abort(403)
+    profiles = profiler.get_profiles()[::-1]
+    for profile in profiles:
+        profile['url'] = '/admin/profiles/' + profile['name']
+    return jsonify(profiles)
+
+
+@app.server.route('/admin/profiles/settings', methods=['GET', 'POST'])
+def profile_settings():
+    """
+    Current profiling settings, changed by posting a json with targets (list of callback ids, callback outputs or
+    function names, '*' for all), sample_rate (0 to 1) and mode (cprofile or tracemalloc). Missing keys keep their
+    value. Only available for the role master.
+
+    :return: json of the profiling settings
+    """
+    if user.role != 'master':
+        abort(403)
+    if request.method == 'POST':
+        settings = dict(profiler.get_settings(), **(request.get_json(silent=True) or {}))
+        targets = settings['targets']
+        if isinstance(targets, str):
+            targets = filter(None, targets.split(','))
+        try:
+            profiler.set_settings(list(targets), float(settings['sample_rate']), settings['mode'])
+        except (TypeError, ValueError):
+            abort(400)
+    return jsonify(profiler.get_settings())
+
+
+@app.server.route('/admin/profiles/<string:name>')
+def download_profile(name):
+    """
+    Download of one stored profile. Only available for the role master.
+
+    :param name: file name of the profile
+    :return: profile file
+    """
+    if user.role != 'master':
+        abort(403)
+    return send_from_directory(os.path.abspath(profiler.folder), name, as_attachment=True)
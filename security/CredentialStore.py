@@ -0,0 +1,74 @@
+import csv
+import hmac
+import os
+import threading
+
+from werkzeug.security import check_password_hash
+
+from security import passwd_file, columns
+
+# prefixes of password hashes created by werkzeug.security.generate_password_hash (see security/hash_passwords.py)
+password_hash_methods = ('pbkdf2:', 'scrypt:', 'sha256$', 'sha512$')
+
+
+class CredentialStore:
+	"""
+	Credentials of the password file indexed by user name. The file is read again as soon as its modification time or
+	size changed, so changed credentials are used without restarting the dashboard.
+	"""
+
+	def __init__(self, passwd_file):
+		self.passwd_file = passwd_file
+		self.credentials = {}
+		self.signature = None
+		self.lock = threading.Lock()
+
+	def get_credentials(self, name):
+		"""
+		:param name: user name
+		:return: tuple of stored password (hash) and role, None if the user does not exist or is listed more than once
+		"""
+		self.refresh()
+		return self.credentials.get(name)
+
+	def refresh(self):
+		stat = os.stat(self.passwd_file)
+		signature = (stat.st_mtime_ns, stat.st_size)
+		if signature == self.signature:
+			return
+		with self.lock:
+			if signature != self.signature:
+				self.credentials = read_credentials(self.passwd_file)
+				self.signature = signature
+
+
+def read_credentials(passwd_file):
+	"""
+	:param passwd_file: csv file with the columns user, password and role
+	:return: dict of (password, role) per user name, users listed more than once map to None
+	"""
+	credentials = {}
+	with open(passwd_file, newline='') as f:
+		for row in csv.DictReader(f):
+			name, password, role = (row.get(column) for column in columns)
+			if not name or not password:
+				continue
+			credentials[name] = None if name in credentials else (password, role)
+	return credentials
+
+
+def verify_password(stored_password, password):
+	"""
+	Compares the entered password with the stored one, stored passwords are either hashes of
+	werkzeug.security.generate_password_hash or plain text
+
+	:param stored_password: password (hash) of the password file
+	:param password: entered password
+	:return: True if the password is correct
+	"""
+	if stored_password.startswith(password_hash_methods):
+		return check_password_hash(stored_password, password)
+	return hmac.compare_digest(stored_password.encode('utf-8'), password.encode('utf-8'))
+
+
+credential_store = CredentialStore(passwd_file)
@@ -1,15 +1,26 @@
+from flask import session
+
 from exceptions.Exceptions import NoSuchUserException, WrongPasswordException, MissingCredentialsException
-from security import auth_pairs
+from security.CredentialStore import credential_store, verify_password
 
 
 class DashboardUser:
 	"""
-	Class for dashboard users having name, role and authorized boolean
+	Class for the dashboard user of the current request having name, role and authorized boolean. The values are stored
+	in the signed session cookie of the browser, so every dashboard process can serve every user.
 	"""
 
-	name = None
-	role = None
-	authorized = False
+	@property
+	def name(self):
+		return session.get('user_name')
+
+	@property
+	def role(self):
+		return session.get('user_role')
+
+	@property
+	def authorized(self):
+		return 'user_name' in session
 
 	def login(self, name, password):
 		"""
@@ -22,17 +33,12 @@ class DashboardUser:
 		if name is None or password is None or name == '' or password == '':
 			raise MissingCredentialsException
 
-		user = auth_pairs.loc[auth_pairs['user'] == name]
-		if user.shape[0] != 1:
+		credentials = credential_store.get_credentials(name)
+		if credentials is None:
 			raise NoSuchUserException
-		if user.iloc[0]['password'] != password:
+		stored_password, role = credentials
+		if not verify_password(stored_password, password):
 			raise WrongPasswordException
 
-		self.name = name
-		self.role = user.iloc[0]['role']
-		self.authorized = True
-
-
-
-
-
+		session['user_name'] = name
+		session['user_role'] = role
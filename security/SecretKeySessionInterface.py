@@ -0,0 +1,16 @@
+from flask.sessions import SecureCookieSessionInterface
+
+
+class SecretKeySessionInterface(SecureCookieSessionInterface):
+	"""
+	Signed cookie sessions whose secret key is loaded on the first request instead of when the dashboard is imported,
+	as the key file is stored on the storage mount.
+	"""
+
+	def __init__(self, get_secret_key):
+		self.get_secret_key = get_secret_key
+
+	def get_signing_serializer(self, app):
+		if not app.secret_key:
+			app.secret_key = self.get_secret_key()
+		return super().get_signing_serializer(app)
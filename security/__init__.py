@@ -1,12 +1,61 @@
-import pandas as pd
+import os
+import secrets
+import time
+
+from exceptions.Exceptions import MissingSecretKeyException
 
 # the passwd.csv file must be stored in ./Jrack-dashboard/security/passwd.csv
 # the content should be like this:
 #
 # user,password,role
 # testaccount,meintollespasswort,master
+#
+# plain text passwords can be replaced by salted hashes with: python -m security.hash_passwords
+# changes of the file are used without restarting the dashboard
 
 passwd_file = '/passwd.csv'
 columns = ['user', 'password', 'role']
-auth_pairs = pd.read_csv(passwd_file)
-auth_pairs = auth_pairs.reindex(columns=columns)
+# reads of a key file which is still empty, because another process is writing the key
+secret_key_read_attempts = 20
+
+
+def get_secret_key(secret_key_file):
+    """
+    Key signing the session cookies. All dashboard processes have to use the same key, it is taken from the environment
+    variable DASHBOARD_SECRET_KEY (required if the dashboard runs in several processes) or from a key file which is
+    created by the first process. Raises MissingSecretKeyException if the key file stays empty.
+
+    :param secret_key_file: path of the key file
+    :return: secret key
+    """
+    if os.environ.get('DASHBOARD_SECRET_KEY'):
+        return os.environ['DASHBOARD_SECRET_KEY']
+
+    os.makedirs(os.path.dirname(secret_key_file), exist_ok=True)
+    try:
+        # fails if another process created the key file already
+        key_file = os.open(secret_key_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        pass
+    else:
+        with open(key_file, 'w') as f:
+            f.write(secrets.token_hex(32))
+
+    for _ in range(secret_key_read_attempts):
+        with open(secret_key_file) as f:
+            secret_key = f.read().strip()
+        if secret_key:
+            return secret_key
+        time.sleep(0.1)
+    raise MissingSecretKeyException
+
+
+def is_multi_process():
+    """
+    :return: whether the dashboard runs in a mod_wsgi daemon with several processes
+    """
+    try:
+        import mod_wsgi
+    except ImportError:
+        return False
+    return getattr(mod_wsgi, 'maximum_processes', 1) > 1
@@ -0,0 +1,40 @@
+"""
+Replaces the plain text passwords of the password file by salted hashes, already hashed passwords are kept.
+
+    python -m security.hash_passwords [/passwd.csv]
+"""
+import csv
+import os
+import sys
+
+from werkzeug.security import generate_password_hash
+
+from security import passwd_file, columns
+from security.CredentialStore import password_hash_methods
+
+
+def hash_passwords(passwd_file):
+	"""
+	:param passwd_file: csv file with the columns user, password and role
+	:return: number of hashed passwords
+	"""
+	with open(passwd_file, newline='') as f:
+		rows = list(csv.DictReader(f))
+
+	hashed = 0
+	for row in rows:
+		if row.get('password') and not row['password'].startswith(password_hash_methods):
+			row['password'] = generate_password_hash(row['password'])
+			hashed += 1
+
+	temp_file = passwd_file + '.tmp'
+	with open(temp_file, 'w', newline='') as f:
+		writer = csv.DictWriter(f, fieldnames=columns, extrasaction='ignore')
+		writer.writeheader()
+		writer.writerows(rows)
+	os.replace(temp_file, passwd_file)
+	return hashed
+
+
+if __name__ == '__main__':
+	print(str(hash_passwords(sys.argv[1] if len(sys.argv) > 1 else passwd_file)) + ' passwords hashed')
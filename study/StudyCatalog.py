@@ -0,0 +1,82 @@
+import os
+import threading
+import time
+
+from app import studies_folder
+
+# seconds in which the studies folder is not checked for changes again
+study_catalog_check_interval = 2
+# maximum seconds between two checks of the study folders without study json, the interval doubles after every check
+study_catalog_max_incomplete_interval = 5 * 60
+
+
+class StudyCatalog:
+    """
+    In-process list of the active studies (folders in the studies folder containing a study json). The folder is only
+    scanned again if its modification time changed. Studies created or closed by this process are added and removed
+    directly. Folders without study json (created by another process which did not write the json yet, or left over)
+    are checked again with a backoff, as writing the json does not change the modification time of the studies folder.
+    """
+
+    def __init__(self, folder, check_interval, max_incomplete_interval):
+        self.folder = folder
+        self.check_interval = check_interval
+        self.max_incomplete_interval = max_incomplete_interval
+        self.studies = set()
+        self.incomplete = set()
+        self.incomplete_interval = check_interval
+        self.next_incomplete_check = 0
+        self.mtime_ns = None
+        self.last_check = 0
+        self.lock = threading.Lock()
+
+    def get_studies(self):
+        """
+        :return: sorted list of active studies
+        """
+        with self.lock:
+            if time.monotonic() - self.last_check >= self.check_interval:
+                self.check()
+            return sorted(self.studies)
+
+    def check(self):
+        now = time.monotonic()
+        mtime_ns = os.stat(self.folder).st_mtime_ns
+        if mtime_ns != self.mtime_ns:
+            self.scan()
+            self.mtime_ns = mtime_ns
+            self.incomplete_interval = self.check_interval
+            self.next_incomplete_check = now + self.incomplete_interval
+        elif self.incomplete and now >= self.next_incomplete_check:
+            completed = set(study for study in self.incomplete if self.has_study_json(study))
+            self.studies |= completed
+            self.incomplete -= completed
+            self.incomplete_interval = min(self.incomplete_interval * 2, self.max_incomplete_interval)
+            self.next_incomplete_check = now + self.incomplete_interval
+        self.last_check = now
+
+    def scan(self):
+        studies = set()
+        incomplete = set()
+        with os.scandir(self.folder) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    (studies if self.has_study_json(entry.name) else incomplete).add(entry.name)
+        self.studies = studies
+        self.incomplete = incomplete
+
+    def has_study_json(self, study_id):
+        return os.path.isfile(os.path.join(self.folder, study_id, study_id + '.json'))
+
+    def add(self, study_id):
+        with self.lock:
+            self.studies.add(study_id)
+            self.incomplete.discard(study_id)
+
+    def remove(self, study_id):
+        with self.lock:
+            self.studies.discard(study_id)
+            self.incomplete.discard(study_id)
+
+
+study_catalog = StudyCatalog(studies_folder, study_catalog_check_interval, study_catalog_max_incomplete_interval)
@@ -0,0 +1,53 @@
+import threading
+
+
+class StudyMetadataCache:
+    """
+    In-process cache of the study metadata, i.e. the study json without its bulky fields. Entries are stored together
+    with the signature of the study json (modification time and size) and only served as long as it did not change.
+    Cached metadata is shared between callers and must not be modified.
+    """
+
+    def __init__(self):
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, study_id, signature, load):
+        """
+        Returns the cached metadata of the study if the signature matches, otherwise the metadata is loaded and cached
+
+        :param study_id: study name
+        :param signature: tuple identifying the state of the study json
+        :param load: function without arguments returning the metadata
+        :return: metadata dict
+        """
+        with self.lock:
+            entry = self.entries.get(study_id)
+            if entry is not None and entry[0] == signature:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        metadata = load()
+        self.put(study_id, signature, metadata)
+        return metadata
+
+    def put(self, study_id, signature, metadata):
+        with self.lock:
+            self.entries[study_id] = (signature, metadata)
+
+    def invalidate(self, study_id):
+        with self.lock:
+            self.entries.pop(study_id, None)
+
+    def get_stats(self):
+        """
+        :return: dict with number of entries, hits and misses
+        """
+        with self.lock:
+            return {'entries': len(self.entries), 'hits': self.hits, 'misses': self.misses}
+
+
+study_metadata_cache = StudyMetadataCache()
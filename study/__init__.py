@@ -2,6 +2,9 @@ import json
 import os
 
 from app import studies_folder
+from study.StudyCatalog import study_catalog
+from study.StudyMetadataCache import study_metadata_cache
+from study.display_study.StudyDataCache import study_df_cache
 
 max_subjects_exp = 5
 number_of_activations = 4
@@ -9,6 +12,9 @@ number_of_activations = 4
 timestamp_format = "%Y-%m-%d %H:%M:%S"
 sep = ':'
 
+# fields of the study json which are not needed to display a study, they are left out of the study metadata
+heavy_study_fields = ['survey']
+
 ema = 'ema'
 main = 'main'
 passive_monitoring = 'passive_monitoring'
@@ -83,15 +89,10 @@ table_columns = ['subject_name',
 
 def list_studies():
     """
-    retrieves study list
-    :return: list with active studies
+    retrieves study list from the study catalog, the studies folder is only scanned if it changed
+    :return: sorted list with active studies
     """
-    study_list = []
-    for study in os.listdir(studies_folder):
-        if os.path.isdir(os.path.join(studies_folder, study)) and os.path.isfile(os.path.join(studies_folder, study, study + '.json')):
-            study_list.append(study)
-
-    return study_list
+    return study_catalog.get_studies()
 
 
 def get_study_list_as_dict():
@@ -106,14 +107,100 @@ def get_study_list_as_dict():
     return study_list
 
 
+def get_study_json_path(study_id):
+    return os.path.join(studies_folder, study_id, study_id + '.json')
+
+
+def get_study_metadata_path(study_id):
+    return os.path.join(studies_folder, study_id, study_id + '.metadata.json')
+
+
 def open_study_json(study_id):
-    study_json_file_path = os.path.join(studies_folder, study_id, study_id + '.json')
-    with open(study_json_file_path, 'r') as f:
+    """
+    Metadata of the study: the study json with None in place of the bulky fields (heavy_study_fields), so a check like
+    'survey' in study_json still works. The metadata is cached in-process as long as the study json did not change
+    and otherwise read from its small sidecar file, the study json itself is only parsed if the sidecar is outdated.
+
+    :param study_id: study name
+    :return: copy of the study metadata
+    """
+    signature = get_study_json_signature(study_id)
+    metadata = study_metadata_cache.get(study_id, signature, lambda: load_study_metadata(study_id, signature))
+    return dict(metadata)
+
+
+def open_full_study_json(study_id):
+    """
+    Loads the complete study json including the bulky fields
+
+    :param study_id: study name
+    :return: study json
+    """
+    with open(get_study_json_path(study_id), 'r') as f:
         study_json = json.load(f)
     return study_json
 
 
 def save_study_json(study_id, study_json):
-    study_json_file_path = os.path.join(studies_folder, study_id, study_id + '.json')
-    with open(study_json_file_path, 'w') as jf:
+    """
+    Writes the study json, its metadata sidecar and the metadata cache. Bulky fields which are None, as in the dict
+    returned by open_study_json, keep their stored value.
+
+    :param study_id: study name
+    :param study_json: complete study json or study metadata
+    """
+    omitted_fields = [field for field in heavy_study_fields if field in study_json and study_json[field] is None]
+    if omitted_fields:
+        stored_json = open_full_study_json(study_id)
+        study_json = dict(study_json, **{field: stored_json.get(field) for field in omitted_fields})
+
+    with open(get_study_json_path(study_id), 'w') as jf:
         json.dump(study_json, jf, ensure_ascii=False, indent=4)
+
+    signature = get_study_json_signature(study_id)
+    metadata = get_study_metadata(study_json)
+    save_study_metadata(study_id, metadata, signature)
+    study_metadata_cache.put(study_id, signature, metadata)
+    study_df_cache.invalidate(study_id)
+
+
+def get_study_json_signature(study_id):
+    stat = os.stat(get_study_json_path(study_id))
+    return stat.st_mtime_ns, stat.st_size
+
+
+def get_study_metadata(study_json):
+    return {key: None if key in heavy_study_fields else value for key, value in study_json.items()}
+
+
+def load_study_metadata(study_id, signature):
+    """
+    Reads the metadata sidecar, it is recreated from the study json if it is missing or was written for another
+    version of the study json
+
+    :param study_id: study name
+    :param signature: modification time and size of the study json
+    :return: study metadata
+    """
+    try:
+        with open(get_study_metadata_path(study_id), 'r') as f:
+            sidecar = json.load(f)
+        if tuple(sidecar['signature']) == signature:
+            return sidecar['metadata']
+    except (FileNotFoundError, ValueError, KeyError, TypeError):
+        pass
+
+    metadata = get_study_metadata(open_full_study_json(study_id))
+    save_study_metadata(study_id, metadata, signature)
+    return metadata
+
+
+def save_study_metadata(study_id, metadata, signature):
+    metadata_path = get_study_metadata_path(study_id)
+    try:
+        with open(metadata_path + '.tmp', 'w') as f:
+            json.dump({'signature': list(signature), 'metadata': metadata}, f, ensure_ascii=False)
+        os.replace(metadata_path + '.tmp', metadata_path)
+    except OSError:
+        # the sidecar only speeds up loading, the study json is still complete
+        pass
@@ -1,6 +1,7 @@
 import os
 
 from app import archive_folder, csv_prefix, studies_folder, storage_folder
+from study.StudyCatalog import study_catalog
 
 
 def close_study(study_id):
@@ -12,6 +13,7 @@ def close_study(study_id):
 	archived_study_path = os.path.join(archive_folder, study_id)
 	os.makedirs(archived_study_path)
 	os.rename(os.path.join(studies_folder, study_id), os.path.join(archived_study_path, study_id))
+	study_catalog.remove(study_id)
 
 	study_csv = csv_prefix + study_id + '.csv'
 	study_csv_path = os.path.join(storage_folder, study_csv)
@@ -1,11 +1,12 @@
-import base64
 import json
 import os
 
-from app import studies_folder, dash_study_folder, qr_folder, sheets_folder, image_resources_folder
-from exceptions.Exceptions import StudyAlreadyExistsException
+from app import studies_folder, dash_study_folder, qr_folder, sheets_folder, image_resources_folder, write_qr_images
+from exceptions.Exceptions import StudyAlreadyExistsException, InvalidSurveyException
 from study import save_study_json
-from study.create_subjects.create_subjects import create_subjects
+from study.StudyCatalog import study_catalog
+from jobs.JobQueue import job_queue
+from uploads.UploadStore import upload_store
 
 
 def create_study(study_dict):
@@ -13,28 +14,45 @@ def create_study(study_dict):
 	Create study using underlying json data which contains study_name, initial number of subjects, study duration and a list
 	of sensors to be used. The new study is created in the storage folder. Further,
 	folders for qr codes and subjects sheets will be create within the dashboard project and filled with corresponding qr codes
-	and pdfs. Lastly, a json file containing meta data of the study is stored.
+	and pdfs by a job of the job queue. Lastly, a json file containing meta data of the study is stored.
 
-	:return: True or False depending if creation succeeded. False if and only if study already exists.
+	The EMA survey and images are given as handles of uploads, the survey is stored in the json and the images zip is
+	moved to the image resources.
+
+	:return: id of the job creating the subjects. Raises StudyAlreadyExistsException if the study already exists,
+			UploadNotFoundException if an upload is incomplete and InvalidSurveyException if the survey is no valid json.
 	"""
 	study_path = os.path.join(studies_folder, study_dict['name'])
 	if os.path.isdir(study_path):
 		raise StudyAlreadyExistsException
+
+	upload_handles = [study_dict[key] for key in ('survey', 'images') if study_dict.get(key)]
+	if study_dict.get('survey'):
+		with open(upload_store.get_file(study_dict['survey']), 'r', encoding='utf-8') as f:
+			try:
+				study_dict['survey'] = json.load(f)
+			except (json.JSONDecodeError, UnicodeDecodeError):
+				raise InvalidSurveyException
+	ema_images_path = upload_store.get_file(study_dict['images']) if study_dict.get('images') else None
+
 	os.makedirs(study_path)
-	os.makedirs(os.path.join(dash_study_folder, study_dict['name'], qr_folder), exist_ok=True)
+	if write_qr_images:
+		os.makedirs(os.path.join(dash_study_folder, study_dict['name'], qr_folder), exist_ok=True)
 	os.makedirs(os.path.join(dash_study_folder, study_dict['name'], sheets_folder), exist_ok=True)
 
-	if 'images' in study_dict and study_dict['images']:
-		ema_images_bytes = base64.b64decode(study_dict['images'])
-		with open(os.path.join(image_resources_folder, study_dict['name'] + '.zip'), 'wb') as zf:
-			zf.write(ema_images_bytes)
-			study_dict['images'] = True
+	if ema_images_path:
+		os.replace(ema_images_path, os.path.join(image_resources_folder, study_dict['name'] + '.zip'))
+		study_dict['images'] = True
+	for upload_handle in upload_handles:
+		upload_store.remove(upload_handle)
 
 	if 'active_labeling' in study_dict and study_dict['active_labeling'] != 0:
 		study_dict['sensor-list'].append('active_labeling')
 
 	# store json file with data
 	save_study_json(study_dict['name'], study_dict)
+	study_catalog.add(study_dict['name'])
 
-	# create subjects depending on initial subject number
-	create_subjects(study_dict['name'], study_dict['number-of-subjects'])
+	# create subjects depending on initial subject number, fpdf and qrcode are only loaded when needed
+	from study.create_subjects.create_subjects import create_subjects_job
+	return job_queue.submit('Creating subjects', create_subjects_job, study_dict['name'], study_dict['number-of-subjects'])
@@ -1,15 +1,13 @@
-import base64
-import json
-
-import dash
 from dash.exceptions import PreventUpdate
-from dash.dependencies import Output, Input, State
+from dash.dependencies import Output, Input, State, ClientsideFunction
 
 from app import app
-from exceptions.Exceptions import StudyAlreadyExistsException
+from exceptions.Exceptions import StudyAlreadyExistsException, UploadNotFoundException, InvalidSurveyException
+from jobs.layout import get_job_progress_div
 from study import ema, passive_monitoring
 from study.create_study.create import create_study
 from study.create_study.layout import get_ema_part, get_passive_monitoring_part, uploaded_div
+from uploads.UploadStore import upload_store
 
 
 @app.callback(Output('create-study-output-state', 'children'),
@@ -45,10 +43,14 @@ def create_study_callback(create_btn, modality_list, study_data, ema_data, passi
 			study_dict.update(passive_monitoring_data)
 
 		try:
-			create_study(study_dict)
-			return 'Study created!'
+			job_id = create_study(study_dict)
+			return ['Study created!', get_job_progress_div(job_id)]
 		except StudyAlreadyExistsException:
 			return 'Study already exists!'
+		except UploadNotFoundException:
+			return 'Uploaded EMA files not found, please upload them again!'
+		except InvalidSurveyException:
+			return 'EMA JSON file is not valid!'
 
 	raise PreventUpdate
 
@@ -66,57 +68,37 @@ def update_data_div_callback(modaliy_checklist_values):
 
 @app.callback([Output('name-upload-json', 'children'),
 			   Output('name-upload-images', 'children')],
-			  [Input('upload-ema-json', 'filename'),
-			   Input('upload-ema-images', 'filename')])
-def update_uploaded_ema_details_callback(json_filename, zip_filename):
-	json_div = uploaded_div(json_filename) if json_filename else ''
-	zip_div = uploaded_div(zip_filename) if zip_filename else ''
+			  [Input('upload-ema-json-handle', 'value'),
+			   Input('upload-ema-images-handle', 'value')])
+def update_uploaded_ema_details_callback(json_handle, zip_handle):
+	json_info = upload_store.get_info(json_handle) if json_handle else None
+	zip_info = upload_store.get_info(zip_handle) if zip_handle else None
+	json_div = uploaded_div(json_info['filename']) if json_info else ''
+	zip_div = uploaded_div(zip_info['filename']) if zip_info else ''
 	return [json_div, zip_div]
 
 
-@app.callback(Output('study-details', 'data'),
-			  [Input('create-study-name', 'value'),
-			   Input('create-study-duration', 'value'),
-			   Input('create-subject-number', 'value'),
-			   Input('create-study-description', 'value')],
-			  [State('study-details', 'data')])
-def update_study_details_callback(name, duration, subject_number, description, data):
-	data['name'] = name
-	data['duration'] = duration
-	data['number-of-subjects'] = subject_number
-	data['description'] = description
-	return data
-
-
-@app.callback(Output('ema-details', 'data'),
-			  [Input('upload-ema-json', 'contents'),
-			   Input('upload-ema-images', 'contents')],
-			  [State('ema-details', 'data')])
-def update_ema_details_callback(ema_json, ema_images_zip, data):
-	ctx = dash.callback_context
-	if len(ctx.triggered) > 0:
-		if ctx.triggered[0]['value']:
-			button_id = ctx.triggered[0]['prop_id'].split('.')[0]
-
-			if button_id == 'upload-ema-json':
-				_, ema_json_content = ema_json.split(',')
-				ema_json_bytes = base64.b64decode(ema_json_content)
-				data['survey'] = json.loads(ema_json_bytes)
-
-			elif button_id == 'upload-ema-images':
-				_, ema_images_content = ema_images_zip.split(',')
-				data['images'] = ema_images_content
-	return data
-
-
-@app.callback(Output('passive-monitoring-details', 'data'),
-			  [Input('frequency-list', 'value'),
-			   Input('create-study-sensors-list', 'value'),
-			   Input('labeling-list', 'value')],
-			  [State('passive-monitoring-details', 'data')])
-def update_passive_monitoring_details_callback(frequency, sensor_list, labeling_list, data):
-	data['frequency'] = frequency
-	data['sensor-list'] = sensor_list
-	data['active_labeling'] = labeling_list
-	return data
+# the form state is kept in the stores by the browser without a request to the server, see
+# assets/clientside-callbacks.js
+app.clientside_callback(ClientsideFunction('create_study', 'update_study_details'),
+						Output('study-details', 'data'),
+						[Input('create-study-name', 'value'),
+						 Input('create-study-duration', 'value'),
+						 Input('create-subject-number', 'value'),
+						 Input('create-study-description', 'value')],
+						[State('study-details', 'data')])
+
+# keeps the handles of the uploaded EMA files, the files are only used when the study is created
+app.clientside_callback(ClientsideFunction('create_study', 'update_ema_details'),
+						Output('ema-details', 'data'),
+						[Input('upload-ema-json-handle', 'value'),
+						 Input('upload-ema-images-handle', 'value')],
+						[State('ema-details', 'data')])
+
+app.clientside_callback(ClientsideFunction('create_study', 'update_passive_monitoring_details'),
+						Output('passive-monitoring-details', 'data'),
+						[Input('frequency-list', 'value'),
+						 Input('create-study-sensors-list', 'value'),
+						 Input('labeling-list', 'value')],
+						[State('passive-monitoring-details', 'data')])
 
@@ -2,6 +2,7 @@ import dash_core_components as dcc
 import dash_html_components as html
 
 from study import sensors_per_modality_dict, main, frequency_dict, labeling_dict, modality_dict
+from uploads.layout import get_chunked_upload
 
 
 def get_create_study_div():
@@ -65,13 +66,10 @@ def get_ema_part():
     return html.Div(id='ema-data', children=[
         html.H4('Ecological momentary assessment'),
         html.Span("Upload for EMA JSON file*:"),
-        dcc.Upload(id='upload-ema-json', className='upload', children=html.Div(['Drag and Drop or ', html.A('Select JSON File')]),
-                   multiple=False,
-                   accept='application/json'),
+        get_chunked_upload('upload-ema-json', ['Drag and Drop or ', html.A('Select JSON File')], accept='application/json'),
         html.Div(id='name-upload-json', className='upload-file'),
         html.Span("Upload for EMA images zip file:"),
-        dcc.Upload(id='upload-ema-images', className='upload', children=html.Div(['Drag and Drop or ', html.A('Select ZIP File')]),
-                   multiple=False),
+        get_chunked_upload('upload-ema-images', ['Drag and Drop or ', html.A('Select ZIP File')]),
         html.Div(id='name-upload-images')
     ])
 
@@ -91,6 +89,9 @@ def get_default_study_details_dict():
 
 
 def get_default_ema_details_dict():
+    """
+    :return: ema details, survey and images are handles of uploads
+    """
     return {
         'survey': None,
         'images': None
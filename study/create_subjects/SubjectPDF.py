@@ -70,15 +70,41 @@ class SubjectPDF(FPDF):
         self.cell(40, 10, txt=text, ln=0, align='L')
         self.ln(10)
 
-    def qr_codes(self, qr_code_path):
+    def qr_codes(self, qr_matrices):
         """
         Draws all 4 qr codes for different activations
 
-        :param qr_code_path: path to qr_code to img file. Only needs the activation number to be completed
+        :param qr_matrices: module matrices (including border) of the qr codes, one per activation
         :return:
         """
         for i in range(1, number_of_activations + 1):
             self.text_field('Activation ' + str(i))
             self.draw_input_line('Date of activation')
-            self.image(qr_code_path + '_' + str(i) + '.png', x=140, y=75 + (i - 1) * 40, w=40)
+            self.draw_qr_code(qr_matrices[i - 1], x=140, y=75 + (i - 1) * 40, w=40)
             self.ln(20)
+
+    def draw_qr_code(self, qr_matrix, x, y, w):
+        """
+        Draws a qr code as vector graphic. The coordinate system is scaled to module units and dark modules next to each
+        other in a row are added as one rectangle to a single path which is filled at once.
+
+        :param qr_matrix: rows of booleans (including border), True for dark modules
+        :param x: left position
+        :param y: top position
+        :param w: width and height of the qr code
+        :return:
+        """
+        module_size = w / len(qr_matrix) * self.k
+        operators = ['q 0 g %.4F 0 0 %.4F %.2F %.2F cm' % (module_size, -module_size, x * self.k, (self.h - y) * self.k)]
+        for row_index, row in enumerate(qr_matrix):
+            col_index = 0
+            while col_index < len(row):
+                if not row[col_index]:
+                    col_index += 1
+                    continue
+                run_start = col_index
+                while col_index < len(row) and row[col_index]:
+                    col_index += 1
+                operators.append('%d %d %d 1 re' % (run_start, row_index, col_index - run_start))
+        operators.append('f Q')
+        self._out('\n'.join(operators))
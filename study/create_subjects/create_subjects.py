@@ -1,34 +1,104 @@
+import multiprocessing
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 
 import qrcode
 
-from app import dash_study_folder, sheets_folder, qr_folder
+from app import dash_study_folder, sheets_folder, qr_folder, subject_creation_workers, subject_creation_python, \
+	write_qr_images
+from monitoring.Profiler import profiled
 from study import max_subjects_exp, number_of_activations
 from study.create_subjects.SubjectPDF import SubjectPDF
 
+# subjects created per worker process at least, smaller batches are not worth starting processes for
+min_subjects_per_worker = 10
 
-def create_subjects(study_id, number_to_create):
+
+def create_subjects(study_id, number_to_create, workers=None, progress=None):
+	"""
+	creates the subjects 1 to number_to_create of a study, subjects whose sheet already exists are skipped. Subjects are
+	distributed over a pool of worker processes if more than one worker is configured. The processes are spawned instead
+	of forked, as the dashboard process runs several threads (jobs, firebase requests) and holds open connections. They
+	run subject_creation_python if set, which is required if the dashboard does not run in a python interpreter (mod_wsgi).
+
+	:param study_id: study name
+	:param number_to_create: total number of subjects the study should have
+	:param workers: number of worker processes, subject_creation_workers if None
+	:param progress: optional function called with the number of created subjects and the number of subjects to create
+	:return: number of created subjects and throughput in subjects per second (None if no subject was created)
+	"""
+	workers = subject_creation_workers if workers is None else workers
+	subject_names = get_missing_subjects(study_id, number_to_create)
+	progress = progress or (lambda created, total: None)
+	progress(0, len(subject_names))
+	start = time.perf_counter()
+
+	workers = min(workers, len(subject_names) // min_subjects_per_worker)
+	if workers > 1:
+		mp_context = multiprocessing.get_context('spawn')
+		if subject_creation_python:
+			mp_context.set_executable(subject_creation_python)
+		with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context) as executor:
+			created_subjects = executor.map(create_subject, [study_id] * len(subject_names), subject_names,
+											chunksize=max(len(subject_names) // (workers * 4), 1))
+			for created, _ in enumerate(created_subjects, start=1):
+				progress(created, len(subject_names))
+	else:
+		for created, subject_name in enumerate(subject_names, start=1):
+			create_subject(study_id, subject_name)
+			progress(created, len(subject_names))
+
+	subjects_per_second = len(subject_names) / (time.perf_counter() - start) if subject_names else None
+	return len(subject_names), subjects_per_second
+
+
+def create_subjects_job(study_id, number_to_create, progress=None):
+	"""
+	create_subjects as job of the job queue
+
+	:return: messages displayed when the job is finished, including the throughput
+	"""
+	created, subjects_per_second = create_subjects(study_id, number_to_create, progress=progress)
+	message = str(created) + ' subject sheets of ' + study_id + ' created'
+	if subjects_per_second:
+		message += ' ({:.1f} subjects/s)'.format(subjects_per_second)
+	return [message + '.']
+
+
+def get_missing_subjects(study_id, number_to_create):
+	"""
+	Subjects of the study whose sheet does not exist yet. Lists the sheets folder once instead of checking every sheet.
+
+	:return: list of subject names
+	"""
+	sheets_path = os.path.join(dash_study_folder, study_id, sheets_folder)
+	existing_sheets = set(os.listdir(sheets_path)) if os.path.isdir(sheets_path) else set()
+	subject_names = [study_id + '_' + str(subject_number).zfill(max_subjects_exp) for subject_number in range(1, number_to_create + 1)]
+	return [subject_name for subject_name in subject_names if subject_name + '.pdf' not in existing_sheets]
+
+
+@profiled
+def create_subject(study_id, subject_name):
 	"""
-	creates one subject, if he or she exists return
+	creates qr codes and sheet of one subject. The qr codes are rendered in memory and drawn into the sheet, png files
+	are only written if write_qr_images is set.
 
 	:return:
 	"""
-	for subject_number in range(1, number_to_create + 1):
-		subject_name = study_id + '_' + str(subject_number).zfill(max_subjects_exp)
-		if os.path.isfile(os.path.join(dash_study_folder, study_id, sheets_folder, subject_name + '.pdf')):
-			continue
-		else:
-			create_qr_codes(study_id, subject_name)
-			write_to_pdf(study_id, subject_name)
+	qr_codes = create_qr_codes(study_id, subject_name)
+	if write_qr_images:
+		save_qr_images(study_id, subject_name, qr_codes)
+	write_to_pdf(study_id, subject_name, qr_codes)
 
 
 def create_qr_codes(study_id, subject_name):
 	"""
-	Function to create a QR-code which corresponds to the new subject given. The Code will be stored in a .png.
+	Function to create the QR-codes of all activations which correspond to the new subject given.
 
-	:return:
+	:return: list of qrcode.QRCode instances, one per activation
 	"""
-	qr_path = os.path.join(dash_study_folder, study_id, qr_folder)
+	qr_codes = []
 	for activation_number in range(1, number_of_activations + 1):
 		user_activation_number = subject_name + '_' + str(activation_number)
 
@@ -43,19 +113,30 @@ def create_qr_codes(study_id, subject_name):
 		# Add data
 		qr.add_data(data)
 		qr.make(fit=True)
+		qr_codes.append(qr)
+	return qr_codes
+
+
+def save_qr_images(study_id, subject_name, qr_codes):
+	"""
+	Stores the QR-codes of a subject as .png files in the qr code folder of the study.
+
+	:return:
+	"""
+	qr_path = os.path.join(dash_study_folder, study_id, qr_folder)
+	os.makedirs(qr_path, exist_ok=True)
+	for activation_number, qr in enumerate(qr_codes, start=1):
 		# Create an image from the QR Code instance
 		img = qr.make_image()
-		# Save it somewhere, change the extension as needed:
-		img.save(os.path.join(qr_path, user_activation_number + '.png'))
+		img.save(os.path.join(qr_path, subject_name + '_' + str(activation_number) + '.png'))
 
 
-def write_to_pdf(study_id, subject_name):
+def write_to_pdf(study_id, subject_name, qr_codes):
 	"""
-	Function to generate a pdf based on QR-Code and other information.
+	Function to generate a pdf based on QR-Codes and other information.
 
 	:return:
 	"""
-	qr_codes_path = os.path.join(dash_study_folder, study_id, qr_folder, subject_name)
 	pdf_path = os.path.join(dash_study_folder, study_id, sheets_folder, subject_name + '.pdf')
 
 	pdf = SubjectPDF(study_id)
@@ -68,6 +149,6 @@ def write_to_pdf(study_id, subject_name):
 	pdf.line(pdf.get_x(), pdf.get_y(), pdf.get_x() + 190, pdf.get_y())
 	pdf.ln(15)
 
-	pdf.qr_codes(qr_codes_path)
+	pdf.qr_codes([qr.get_matrix() for qr in qr_codes])
 
 	pdf.output(pdf_path)
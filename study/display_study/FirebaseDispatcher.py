@@ -0,0 +1,139 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app import push_notification_workers, push_notification_timeout, push_notification_retries
+
+# firebase accepts at most 1000 registration ids per request
+firebase_max_batch_size = 1000
+# http status codes after which a batch is sent again
+retry_status_codes = (429, 500, 502, 503, 504)
+# errors of single tokens in an accepted batch after which the token is sent again
+retry_token_errors = ('Unavailable', 'InternalServerError')
+
+
+class FirebaseDispatcher:
+    """
+    Sends push notifications to firebase cloud messaging. The receivers are split into batches of at most
+    firebase_max_batch_size tokens, the batches are sent concurrently by a bounded number of threads which share one
+    pooled http session. Failed batches and tokens with temporary errors are retried with exponential backoff.
+    """
+
+    def __init__(self, workers, timeout, retries, backoff=0.5, max_batch_size=firebase_max_batch_size):
+        self.workers = workers
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_batch_size = max_batch_size
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.executor = None
+        self.lock = threading.Lock()
+
+    def get_executor(self):
+        with self.lock:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='firebase')
+            return self.executor
+
+    def get_batches(self, tokens):
+        return [tokens[i:i + self.max_batch_size] for i in range(0, len(tokens), self.max_batch_size)]
+
+    def send(self, url, messages, progress=None):
+        """
+        Sends messages to firebase and waits until all batches are answered
+
+        :param url: firebase send url
+        :param messages: list of tuples (authorization key, data of the notification, list of tokens)
+        :param progress: optional function called with the number of sent tokens and the total number of tokens
+        :return: list of dicts per batch with the index of the 'message', the sent 'tokens', the firebase 'response' and
+                 an 'error' message which is None if the batch was accepted
+        """
+        executor = self.get_executor()
+        futures = []
+        for message_index, (auth_key, data, tokens) in enumerate(messages):
+            for batch in self.get_batches(tokens):
+                futures.append((message_index, executor.submit(self.send_batch, url, auth_key, data, batch)))
+
+        results = []
+        total = sum(len(tokens) for _, _, tokens in messages)
+        sent = 0
+        for message_index, future in futures:
+            result = future.result()
+            result['message'] = message_index
+            results.append(result)
+            if progress:
+                sent += len(result['tokens'])
+                progress(sent, total)
+        return results
+
+    def send_batch(self, url, auth_key, data, tokens):
+        """
+        Sends one batch, retries it on connection errors, timeouts and temporary server errors. Tokens whose result in
+        an accepted batch is a temporary error are sent again with the same backoff.
+
+        :param url: firebase send url
+        :param auth_key: authorization key of the firebase project
+        :param data: data of the notification
+        :param tokens: registration tokens of the batch
+        :return: dict with 'tokens', 'response' and 'error'. The response contains the last result of every token.
+        """
+        headers = {'Authorization': auth_key, 'Content-Type': 'application/json'}
+        results = [None] * len(tokens)
+        # indices of the tokens which are sent by the next attempt
+        pending = list(range(len(tokens)))
+        error = None
+
+        for attempt in range(self.retries + 1):
+            retry_after = None
+            body = {'data': data, 'registration_ids': [tokens[index] for index in pending]}
+            try:
+                response = self.session.post(url, headers=headers, json=body, timeout=self.timeout)
+            except requests.RequestException as e:
+                error = type(e).__name__
+            else:
+                if response.status_code == 200:
+                    try:
+                        token_results = response.json().get('results', [])
+                    except (ValueError, AttributeError):
+                        error = 'Invalid response'
+                        break
+                    error = None
+                    for index, result in zip(pending, token_results):
+                        results[index] = result
+                    pending = [index for index in pending if results[index] is None or
+                               results[index].get('error') in retry_token_errors]
+                    if not pending:
+                        break
+                else:
+                    error = 'HTTP ' + str(response.status_code)
+                    if response.status_code not in retry_status_codes:
+                        break
+                retry_after = response.headers.get('Retry-After')
+
+            if attempt < self.retries:
+                time.sleep(self.get_backoff(attempt, retry_after))
+
+        if all(result is None for result in results):
+            return {'tokens': tokens, 'response': None, 'error': error}
+        error_result = {'error': error or 'No result'}
+        return {'tokens': tokens, 'response': {'results': [result or error_result for result in results]}, 'error': None}
+
+    def get_backoff(self, attempt, retry_after=None):
+        """
+        :param attempt: number of the failed attempt, starting at 0
+        :param retry_after: value of the Retry-After header of the response if given in seconds
+        :return: seconds to wait before the next attempt
+        """
+        if retry_after and retry_after.isdigit():
+            return min(int(retry_after), self.timeout)
+        return self.backoff * 2 ** attempt * random.uniform(0.5, 1)
+
+
+firebase_dispatcher = FirebaseDispatcher(push_notification_workers, push_notification_timeout, push_notification_retries)
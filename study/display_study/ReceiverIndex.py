@@ -0,0 +1,128 @@
+import threading
+import weakref
+from bisect import bisect_left
+
+from exceptions.Exceptions import EmptyStudyTableException
+from study import open_study_json
+from study.display_study.study_data import read_study_df, get_ids_and_app_list
+from study.display_study.StudyStatusCache import study_status_cache
+
+# groups of ids (qr code and app) of a study
+all_ids = 'all'
+missing_data_ids = 'missing-data'
+not_left_ids = 'not-left'
+
+# dropdown values selecting a whole group, resolved on the server when the group is used
+group_values = {'@' + all_ids: 'All IDs', '@' + missing_data_ids: 'Missing data IDs'}
+
+# maximum number of ids returned by a search
+receiver_search_limit = 100
+
+
+class ReceiverIndex:
+    """
+    In-process index of the ids selectable in the push notification and remove user dropdowns. The groups are the ids
+    of the status served by StudyStatusCache, kept sorted by their lower case form, so the dropdowns are filled by a
+    prefix search as the user types instead of receiving all ids of the study. The sorted ids are rebuilt when the
+    cached status changes. Ids removed from the study are left out as long as the study data frame is the same, as the
+    study csv only contains the time the user left after the next export.
+    """
+
+    def __init__(self, search_limit):
+        self.search_limit = search_limit
+        # status the groups were built from and sorted groups per study
+        self.entries = {}
+        # weak reference to the study data frame and set of removed ids per study
+        self.removed = {}
+        self.lock = threading.Lock()
+
+    def get_groups(self, study_id):
+        """
+        :param study_id: study name
+        :return: dict of sorted (lower case id, id) tuples per group, empty if the study has no data
+        """
+        study_json = open_study_json(study_id)
+        try:
+            study_df = read_study_df(study_json)
+        except (FileNotFoundError, KeyError, EmptyStudyTableException):
+            return {}
+        status = study_status_cache.get(study_json, study_df)
+        with self.lock:
+            entry = self.entries.get(study_id)
+            if entry is not None and entry[0] is status:
+                return entry[1]
+
+            removed = self.removed.get(study_id)
+            if removed is not None and removed[0]() is not study_df:
+                del self.removed[study_id]
+                removed = None
+            removed_ids = removed[1] if removed is not None else set()
+            _, missing_data_dict, active_users_dict, not_left_users_dict = status
+            groups = {group: sorted((id_and_app.lower(), id_and_app) for id_and_app in get_ids_and_app_list(ids_dict)
+                                    if id_and_app not in removed_ids)
+                      for group, ids_dict in ((all_ids, active_users_dict), (missing_data_ids, missing_data_dict),
+                                              (not_left_ids, not_left_users_dict))}
+            self.entries[study_id] = (status, groups)
+        return groups
+
+    def remove(self, study_id, id_and_app):
+        """
+        Removes an id which left the study from all groups
+
+        :param study_id: study name
+        :param id_and_app: removed id, <qr code id><sep><modality>
+        :return:
+        """
+        study_json = open_study_json(study_id)
+        try:
+            study_df = read_study_df(study_json)
+        except (FileNotFoundError, KeyError, EmptyStudyTableException):
+            return
+        with self.lock:
+            removed = self.removed.get(study_id)
+            if removed is None or removed[0]() is not study_df:
+                removed = self.removed[study_id] = (weakref.ref(study_df), set())
+            removed[1].add(id_and_app)
+            entry = self.entries.get(study_id)
+            if entry is not None:
+                groups = {group: [key_and_id for key_and_id in ids if key_and_id[1] != id_and_app]
+                          for group, ids in entry[1].items()}
+                self.entries[study_id] = (entry[0], groups)
+
+    def search(self, study_id, group, prefix):
+        """
+        :param study_id: study name
+        :param group: group of ids which is searched
+        :param prefix: beginning of the ids, case insensitive
+        :return: sorted list of at most search_limit ids
+        """
+        entries = self.get_groups(study_id).get(group, [])
+        prefix = (prefix or '').lower()
+        ids = []
+        for key, id_and_app in entries[bisect_left(entries, (prefix,)):]:
+            if not key.startswith(prefix) or len(ids) == self.search_limit:
+                break
+            ids.append(id_and_app)
+        return ids
+
+    def resolve(self, study_id, values):
+        """
+        Replaces the group values of a dropdown by the ids of the groups
+
+        :param study_id: study name
+        :param values: selected ids and group values
+        :return: sorted list of ids
+        """
+        groups = self.get_groups(study_id) if any(value in group_values for value in values) else {}
+        ids = set(value for value in values if value not in group_values)
+        for value in values:
+            if value in group_values:
+                ids.update(id_and_app for _, id_and_app in groups.get(value[1:], []))
+        return sorted(ids)
+
+
+def get_group_options():
+    return [{'label': label, 'value': value} for value, label in group_values.items()]
+
+
+receiver_index = ReceiverIndex(receiver_search_limit)
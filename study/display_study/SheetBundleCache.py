@@ -0,0 +1,92 @@
+import hashlib
+import os
+import threading
+import uuid
+
+from app import sheet_bundle_folder, sheet_bundle_cache_max_bytes
+
+
+class SheetBundleCache:
+    """
+    Content addressed store of zipped subject sheet bundles. A bundle is identified by a hash of the study and the sorted
+    names of the sheets it contains, so a bundle only has to be created again if the set of unused sheets changed
+    (subjects enrolled or created). The least recently used bundles are removed as soon as the size budget is exceeded.
+    """
+
+    def __init__(self, folder, max_bytes):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def get_key(study_id, sheet_paths):
+        """
+        :param study_id: study name
+        :param sheet_paths: paths of the sheets in the bundle
+        :return: hex digest identifying the bundle, used as file name and ETag
+        """
+        sheet_names = sorted(os.path.basename(sheet_path) for sheet_path in sheet_paths)
+        return hashlib.sha256('\n'.join([study_id] + sheet_names).encode('utf-8')).hexdigest()
+
+    def get_path(self, key):
+        return os.path.join(self.folder, key + '.zip')
+
+    def get_bundle(self, key):
+        """
+        :param key: bundle key
+        :return: path of the stored bundle or None if it does not exist. Marks the bundle as recently used.
+        """
+        bundle_path = self.get_path(key)
+        try:
+            os.utime(bundle_path)
+        except FileNotFoundError:
+            return None
+        return bundle_path
+
+    def store(self, key, chunks):
+        """
+        Generator passing the chunks of a bundle through while writing them to the store. The bundle is only added to the
+        store once all chunks are written, an interrupted download leaves no bundle behind.
+
+        :param key: bundle key
+        :param chunks: iterable of bytes
+        :return: generator yielding the chunks
+        """
+        os.makedirs(self.folder, exist_ok=True)
+        temp_path = self.get_path(key) + '.' + uuid.uuid4().hex + '.tmp'
+        try:
+            with open(temp_path, 'wb') as f:
+                for chunk in chunks:
+                    f.write(chunk)
+                    yield chunk
+            os.replace(temp_path, self.get_path(key))
+        finally:
+            if os.path.isfile(temp_path):
+                os.remove(temp_path)
+        self.evict()
+
+    def evict(self):
+        """
+        Removes the least recently used bundles until the stored bundles fit into the size budget
+
+        :return:
+        """
+        with self.lock:
+            bundles = []
+            for entry in os.scandir(self.folder):
+                if entry.name.endswith('.zip'):
+                    stat = entry.stat()
+                    bundles.append((stat.st_mtime, stat.st_size, entry.path))
+
+            total_bytes = sum(size for _, size, _ in bundles)
+            for _, size, bundle_path in sorted(bundles):
+                if total_bytes <= self.max_bytes:
+                    break
+                try:
+                    os.remove(bundle_path)
+                except FileNotFoundError:
+                    pass
+                total_bytes -= size
+
+
+sheet_bundle_cache = SheetBundleCache(sheet_bundle_folder, sheet_bundle_cache_max_bytes)
@@ -0,0 +1,81 @@
+import threading
+from collections import OrderedDict
+
+from app import study_cache_max_bytes
+
+
+class StudyDataCache:
+    """
+    LRU cache for processed study data frames. Entries are stored together with a signature of the files they were
+    created from (modification times and sizes). An entry is only served as long as the signature did not change and
+    the least recently used entries are evicted as soon as the cached frames exceed the memory budget.
+    Cached frames are shared between callers and must not be modified.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get(self, study_id, signature, load):
+        """
+        Returns the cached frame of the study if the signature matches, otherwise the frame is loaded and cached
+
+        :param study_id: study name
+        :param signature: tuple identifying the state of the underlying files
+        :param load: function without arguments returning the processed study data frame
+        :return: study data frame
+        """
+        with self.lock:
+            entry = self.entries.get(study_id)
+            if entry is not None and entry[0] == signature:
+                self.entries.move_to_end(study_id)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        study_df = load()
+        n_bytes = int(study_df.memory_usage(index=True, deep=True).sum())
+
+        with self.lock:
+            self._remove(study_id)
+            if n_bytes <= self.max_bytes:
+                self.entries[study_id] = (signature, study_df, n_bytes)
+                self.total_bytes += n_bytes
+                while self.total_bytes > self.max_bytes:
+                    self._remove(next(iter(self.entries)))
+                    self.evictions += 1
+        return study_df
+
+    def invalidate(self, study_id):
+        with self.lock:
+            self._remove(study_id)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.total_bytes = 0
+
+    def get_stats(self):
+        """
+        :return: dict with number of entries, used bytes, hits, misses and evictions
+        """
+        with self.lock:
+            return {'entries': len(self.entries),
+                    'bytes': self.total_bytes,
+                    'max_bytes': self.max_bytes,
+                    'hits': self.hits,
+                    'misses': self.misses,
+                    'evictions': self.evictions}
+
+    def _remove(self, study_id):
+        entry = self.entries.pop(study_id, None)
+        if entry is not None:
+            self.total_bytes -= entry[2]
+
+
+study_df_cache = StudyDataCache(study_cache_max_bytes)
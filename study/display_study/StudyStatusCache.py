@@ -0,0 +1,49 @@
+import threading
+import time
+import weakref
+
+from study.display_study.study_data import get_study_files_signature
+from study.display_study.study_status import get_study_status
+
+# seconds a status is used, the missing data status changes with the current time even if the study data did not
+study_status_max_age = 60
+
+
+class StudyStatusCache:
+    """
+    Cache of the status computed by get_study_status for the cached study data frames. An entry is served as long as
+    the signature of the study files (see StudyDataCache) did not change, it was computed from the same frame and it is
+    younger than max_age. Only a weak reference to the frame is kept, so evicted frames are not held in memory.
+    Cached status tuples are shared between callers and must not be modified.
+    """
+
+    def __init__(self, max_age):
+        self.max_age = max_age
+        self.entries = {}
+        self.lock = threading.Lock()
+
+    def get(self, study_json, study_df):
+        """
+        :param study_json: study json
+        :param study_df: study data frame returned by read_study_df
+        :return: tuple returned by get_study_status
+        """
+        study_id = study_json["name"]
+        signature = get_study_files_signature(study_id)
+        with self.lock:
+            entry = self.entries.get(study_id)
+        if entry is not None and entry[0] == signature and entry[1]() is study_df and \
+                time.time() - entry[2] < self.max_age:
+            return entry[3]
+
+        status = get_study_status(study_json, study_df)
+        with self.lock:
+            self.entries[study_id] = (signature, weakref.ref(study_df), time.time(), status)
+        return status
+
+    def invalidate(self, study_id):
+        with self.lock:
+            self.entries.pop(study_id, None)
+
+
+study_status_cache = StudyStatusCache(study_status_max_age)
@@ -0,0 +1,165 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from app import users_folder, user_index_file
+from study import modalities, suffix_per_modality_dict
+
+# seconds after which the user jsons of a study are checked again even if the users folder did not change, user jsons
+# rewritten in place by the backend do not change the modification time of the folder
+user_index_max_age = 60
+
+
+class UserIndex:
+    """
+    Local sqlite index of the user jsons in users_folder. For every receiver and modality it holds the push token, the
+    token marked as invalid, the status and the time the receiver left. The index of a study is refreshed incrementally:
+    only user jsons whose modification time or size changed are read again. The users folder is only scanned if its
+    modification time changed or the last scan of the study is older than max_age. The index file is created on the
+    first connection.
+    """
+
+    def __init__(self, users_folder, index_file, max_age):
+        self.users_folder = users_folder
+        self.index_file = index_file
+        self.max_age = max_age
+        # modification time of the users folder and time of the last scan per study
+        self.refreshed = {}
+        self.table_created = False
+        self.lock = threading.Lock()
+
+    def connect(self):
+        connection = sqlite3.connect(self.index_file, timeout=30)
+        if not self.table_created:
+            with connection:
+                connection.execute('CREATE TABLE IF NOT EXISTS receivers ('
+                                   'study_id TEXT, receiver TEXT, modality TEXT, token TEXT, invalid_token TEXT, '
+                                   'status INTEGER, time_left INTEGER, mtime_ns INTEGER, size INTEGER, '
+                                   'PRIMARY KEY (study_id, receiver, modality))')
+            self.table_created = True
+        return connection
+
+    def refresh_if_changed(self, study_id):
+        """
+        Refreshes the index of the study if the users folder changed or the last refresh is older than max_age
+
+        :param study_id: study name
+        :return:
+        """
+        folder_mtime_ns = os.stat(self.users_folder).st_mtime_ns
+        with self.lock:
+            last_refresh = self.refreshed.get(study_id)
+        if last_refresh is None or last_refresh[0] != folder_mtime_ns or time.time() - last_refresh[1] >= self.max_age:
+            self.refresh(study_id)
+
+    def refresh(self, study_id):
+        """
+        Reads the user jsons of the study which were added or changed since the last refresh and removes deleted ones
+
+        :param study_id: study name
+        :return:
+        """
+        user_json_pattern = get_user_json_pattern(study_id)
+        with self.lock:
+            folder_mtime_ns = os.stat(self.users_folder).st_mtime_ns
+            scan_time = time.time()
+            connection = self.connect()
+            with connection:
+                indexed = dict(((receiver, (mtime_ns, size)) for receiver, mtime_ns, size in connection.execute(
+                    'SELECT receiver, mtime_ns, size FROM receivers WHERE study_id = ?', (study_id,))))
+
+                for entry in os.scandir(self.users_folder):
+                    match = user_json_pattern.fullmatch(entry.name)
+                    if match is None:
+                        continue
+                    receiver = match.group(1)
+                    stat = entry.stat()
+                    if indexed.pop(receiver, None) != (stat.st_mtime_ns, stat.st_size):
+                        self.index_receiver(connection, study_id, receiver, entry.path, stat)
+
+                connection.executemany('DELETE FROM receivers WHERE study_id = ? AND receiver = ?',
+                                       [(study_id, receiver) for receiver in indexed])
+            connection.close()
+            self.refreshed[study_id] = (folder_mtime_ns, scan_time)
+
+    def clear(self, study_id):
+        """
+        Removes the index of the study, it is built again by the next refresh
+
+        :param study_id: study name
+        :return:
+        """
+        with self.lock:
+            connection = self.connect()
+            with connection:
+                connection.execute('DELETE FROM receivers WHERE study_id = ?', (study_id,))
+            connection.close()
+            self.refreshed.pop(study_id, None)
+
+    def update_receiver(self, study_id, receiver):
+        """
+        Indexes the user json of one receiver again, called after the dashboard changed it. Receivers whose user json
+        does not match get_user_json_pattern are not indexed.
+
+        :param study_id: study name
+        :param receiver: qr code id
+        :return:
+        """
+        if not get_user_json_pattern(study_id).fullmatch(study_id + '_' + receiver + '.json'):
+            return
+        user_json_path = os.path.join(self.users_folder, study_id + '_' + receiver + '.json')
+        with self.lock:
+            connection = self.connect()
+            with connection:
+                self.index_receiver(connection, study_id, receiver, user_json_path, os.stat(user_json_path))
+            connection.close()
+
+    @staticmethod
+    def index_receiver(connection, study_id, receiver, user_json_path, stat):
+        try:
+            with open(user_json_path) as f:
+                user_json = json.load(f)
+        except ValueError:
+            # the json is being written, it is indexed on the next refresh
+            return
+
+        rows = []
+        for modality in modalities:
+            suffix = suffix_per_modality_dict[modality]
+            rows.append((study_id, receiver, modality, user_json.get('pushNotification_token' + suffix),
+                         user_json.get('pushNotification_token' + suffix + '_invalid'),
+                         user_json.get('status' + suffix), user_json.get('time_left' + suffix),
+                         stat.st_mtime_ns, stat.st_size))
+        connection.executemany('INSERT OR REPLACE INTO receivers VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+
+    def get_tokens(self, study_id, modality):
+        """
+        Tokens of the indexed receivers, refresh_if_changed has to be called before
+
+        :param study_id: study name
+        :param modality: app of the tokens
+        :return: dict of (push token, invalid token) per qr code id, tokens are None if not set
+        """
+        connection = self.connect()
+        tokens = dict(((receiver, (token, invalid_token)) for receiver, token, invalid_token in connection.execute(
+            'SELECT receiver, token, invalid_token FROM receivers WHERE study_id = ? AND modality = ?',
+            (study_id, modality))))
+        connection.close()
+        return tokens
+
+
+def get_user_json_pattern(study_id):
+    """
+    User jsons are named <study>_<qr code id>.json and qr code ids <study>_<subject number>_<activation number>, see
+    create_subjects. Matching the whole name keeps user jsons of studies whose name starts with the study name apart.
+
+    :param study_id: study name
+    :return: compiled pattern, its first group is the qr code id
+    """
+    return re.compile(re.escape(study_id) + '_(' + re.escape(study_id) + r'_\d+_\d+)\.json')
+
+
+user_index = UserIndex(users_folder, user_index_file, user_index_max_age)
@@ -2,20 +2,21 @@ import os
 
 import dash
 from dash.exceptions import PreventUpdate
-from flask import send_file
+from flask import send_file, Response, request
+from werkzeug.wsgi import wrap_file
 import dash_html_components as html
 from app import dash_study_folder, zip_file, sheets_folder, app, user
 from exceptions.Exceptions import EmptyStudyTableException
-from dash.dependencies import Output, Input, State
+from jobs.JobQueue import job_queue
+from jobs.layout import get_job_progress_div
+from dash.dependencies import Output, Input, State, ClientsideFunction
 
 from study import open_study_json, save_study_json, timestamp_format, remove_status_code
-from study.create_subjects.create_subjects import create_subjects
-from study.display_study.download_sheets import zip_unused_sheets, get_download_unused_sheets_button
 from study.display_study.layout import get_study_info_div
-from study.display_study.push_notification import send_push_notification, get_push_notification_div
-from study.display_study.remove_user import get_remove_users_div, remove_user
-from study.display_study.study_data import read_study_df
-from study.display_study.study_table import get_study_data_table
+from study.display_study.SheetBundleCache import sheet_bundle_cache
+
+# modules depending on pandas, numpy, fpdf, qrcode or requests are imported by the callbacks using them, so that these
+# libraries are not loaded before a study is opened (see benchmarks/startup.py)
 
 
 @app.callback([Output('study-info-div', 'children'),
@@ -35,6 +36,13 @@ def display_study_info_callback(study_id):
                 Displayed beneath the drop down list. Returned by Output('current-selected-study', 'children').
     """
     if study_id:
+        from study.display_study.download_sheets import get_download_unused_sheets_button
+        from study.display_study.paginated_table import get_paginated_study_data_table, paginated_table_min_rows
+        from study.display_study.push_notification import get_push_notification_div
+        from study.display_study.remove_user import get_remove_users_div
+        from study.display_study.study_data import read_study_df
+        from study.display_study.study_table import get_study_data_table
+
         study_json = open_study_json(study_id)
         try:
             study_df = read_study_df(study_json)
@@ -45,9 +53,13 @@ def display_study_info_callback(study_id):
         study_download_link = get_download_unused_sheets_button(study_json)
 
         if study_df is not None:
-            study_table, missing_data_dict, active_users_dict, not_left_users_dict = get_study_data_table(study_json, study_df)
-            push_notification_div = get_push_notification_div(missing_data_dict, active_users_dict)
-            remove_users_div = get_remove_users_div(not_left_users_dict)
+            if len(study_df.index) > paginated_table_min_rows:
+                study_table = get_paginated_study_data_table(study_json, study_df)[0]
+            else:
+                study_table = get_study_data_table(study_json, study_df)[0]
+            # the dropdowns of push notifications and remove user search the ids in the receiver index
+            push_notification_div = get_push_notification_div()
+            remove_users_div = get_remove_users_div()
         else:
             study_table = html.Div("No data available.")
             push_notification_div = ''
@@ -58,6 +70,42 @@ def display_study_info_callback(study_id):
         raise PreventUpdate
 
 
+@app.callback([Output('study-data-table', 'data'),
+               Output('study-data-table', 'page_count'),
+               Output('study-data-table', 'style_data_conditional')],
+              [Input('study-data-table', 'page_current'),
+               Input('study-data-table', 'page_size'),
+               Input('study-data-table', 'sort_by'),
+               Input('study-data-table', 'filter_query'),
+               Input('study-table-highlight-filter', 'value')],
+              [State('current-study-list', 'value')])
+def update_study_table_page_callback(page_current, page_size, sort_by, filter_query, highlights, study_id):
+    """
+    Callback serving the rows of the current page of the paginated study table. Filtering and sorting is done on the
+    server, only the visible rows are sent to the browser.
+
+    :param page_current: index of the current page
+    :param page_size: number of rows per page
+    :param sort_by: sorting of the data table
+    :param filter_query: filter query of the data table
+    :param highlights: highlight colors selected in the highlight filter
+    :param study_id: name of the displayed study
+    :return: data, page count and conditional styles of the data table
+    """
+    if not study_id:
+        raise PreventUpdate
+    from study.display_study.paginated_table import get_study_table_page
+    from study.display_study.study_data import read_study_df
+
+    study_json = open_study_json(study_id)
+    try:
+        study_df = read_study_df(study_json)
+    except (FileNotFoundError, KeyError, EmptyStudyTableException):
+        raise PreventUpdate
+
+    return get_study_table_page(study_json, study_df, page_current or 0, page_size, sort_by, filter_query, highlights)
+
+
 @app.server.route('/download-<string:study_id>-<string:user>')
 def download_marked_sheets(study_id, user):
     """
@@ -76,93 +124,165 @@ def download_marked_sheets(study_id, user):
 @app.server.route('/download-<string:study_id>')
 def download_sheets(study_id):
     """
-    Execute download of subject-sheet-zip which contains all of the subject sheets for every subject of one specified study
+    Execute download of subject-sheet-zip which contains the sheets of all subjects of one specified study which are not
+    enrolled yet. Bundles are stored by SheetBundleCache: a stored bundle is sent directly, otherwise the zip is created
+    while it is sent and stored afterwards. The bundle key is sent as ETag, so unchanged bundles are not sent again.
     :param study_id: specified study of which the sheets should be downloaded
 
-    :return: Flask send_file which delivers the zip belonging to the study
+    :return: Flask response which delivers the zip belonging to the study
     """
 
-    zip_unused_sheets(study_id)
-    return send_file(os.path.join(dash_study_folder, study_id, zip_file),
-                     mimetype='application/zip',
-                     as_attachment=True)
+    from study.display_study.download_sheets import get_unused_sheets, stream_zip
+
+    sheet_paths = get_unused_sheets(study_id)
+    bundle_key = sheet_bundle_cache.get_key(study_id, sheet_paths)
+
+    if request.if_none_match.contains(bundle_key):
+        response = Response(status=304)
+    else:
+        bundle_path = sheet_bundle_cache.get_bundle(bundle_key)
+        if bundle_path:
+            response = Response(wrap_file(request.environ, open(bundle_path, 'rb')), mimetype='application/zip',
+                                direct_passthrough=True)
+            response.content_length = os.path.getsize(bundle_path)
+        else:
+            response = Response(sheet_bundle_cache.store(bundle_key, stream_zip(sheet_paths)), mimetype='application/zip')
+        response.headers['Content-Disposition'] = 'attachment; filename=' + zip_file
+
+    response.set_etag(bundle_key)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
 
 
 @app.callback([Output('total-subjects', 'children'),
-               Output('create-additional-subjects-input', 'value')],
+               Output('create-additional-subjects-input', 'value'),
+               Output('create-subject-job-div', 'children')],
               [Input('create-additional-subjects-button', 'n_clicks')],
               [State('current-study-list', 'value'),
                State('create-additional-subjects-input', 'value')])
 def create_additional_subjects_callback(n_clicks, study_id, number_of_subjects):
     """
-    Creates additional subjects on button click. QR-Codes and study sheets are added to the existing directories
+    Creates additional subjects on button click. QR-Codes and study sheets are added to the existing directories by a
+    job of the job queue
 
     :param n_clicks: not used
     :param study_id: study receiving new subjects
     :param number_of_subjects: number of new subjects
-    :return: refreshes current number of subjects state and clears input field
+    :return: refreshes current number of subjects state, clears input field and displays the progress of the job
     """
     if n_clicks and number_of_subjects and (user.role == 'master' or user.role == 'invest'):
         study_json = open_study_json(study_id)
         study_json["number-of-subjects"] = int(study_json["number-of-subjects"]) + number_of_subjects
         save_study_json(study_id, study_json)
 
-        create_subjects(study_json["name"], study_json["number-of-subjects"])
+        from study.create_subjects.create_subjects import create_subjects_job
 
-        return "Total number of subject: " + str(study_json["number-of-subjects"]), ''
+        job_id = job_queue.submit('Creating subjects', create_subjects_job, study_json["name"], study_json["number-of-subjects"])
+
+        return "Total number of subject: " + str(study_json["number-of-subjects"]), '', get_job_progress_div(job_id)
     else:
         raise PreventUpdate
 
 
-@app.callback([Output('push-notification-title', 'value'),
-               Output('push-notification-text', 'value'),
-               Output('receiver-list', 'value'),
-               Output('push-notification-output-state', 'children')],
-              [Input('user-with-missing-data-button', 'n_clicks'),
-               Input('every-user-button', 'n_clicks'),
-               Input('send-push-notification-button', 'n_clicks')],
+# filling the receivers by the autofill buttons and clearing the form after sending is done in the browser, see
+# assets/clientside-callbacks.js
+app.clientside_callback(ClientsideFunction('display_study', 'update_push_notification_form'),
+                        [Output('push-notification-title', 'value'),
+                         Output('push-notification-text', 'value'),
+                         Output('receiver-list', 'value')],
+                        [Input('user-with-missing-data-button', 'n_clicks'),
+                         Input('every-user-button', 'n_clicks'),
+                         Input('push-notification-sent', 'data')])
+
+
+@app.callback(Output('receiver-list', 'options'),
+              [Input('receiver-list', 'search_value')],
+              [State('receiver-list', 'value'),
+               State('current-study-list', 'value')])
+def update_receiver_options_callback(search_value, receivers, study_id):
+    """
+    Fills the receiver dropdown with the active ids starting with the typed text. The groups and the selected ids are
+    always part of the options.
+
+    :param search_value: text typed into the dropdown
+    :param receivers: selected ids and groups
+    :param study_id: selected study
+    :return: dropdown options
+    """
+    if not study_id:
+        raise PreventUpdate
+    from study.display_study.ReceiverIndex import receiver_index, all_ids, group_values, get_group_options
+
+    ids = set(receiver_index.search(study_id, all_ids, search_value))
+    ids.update(receiver for receiver in receivers or [] if receiver not in group_values)
+    return get_group_options() + [{'label': receiver, 'value': receiver} for receiver in sorted(ids)]
+
+
+@app.callback([Output('push-notification-output-state', 'children'),
+               Output('push-notification-sent', 'data')],
+              [Input('send-push-notification-button', 'n_clicks')],
               [State('push-notification-title', 'value'),
                State('push-notification-text', 'value'),
                State('receiver-list', 'value'),
-               State('user-with-missing-data-button', 'data-user-list'),
-               State('every-user-button', 'data-user-list'),
                State('current-study-list', 'value')])
-def push_notifications(autofillbtn1, autofillbtn2, send_button, title, text, receivers, missing_data_users_list, every_user_list , study_id):
-    ctx = dash.callback_context
-
-    if len(ctx.triggered) > 0:
-        if ctx.triggered[0]['value']:
-            button_id = ctx.triggered[0]['prop_id'].split('.')[0]
-            if button_id == 'user-with-missing-data-button':
-                return title, text, missing_data_users_list, ''
-            if button_id == 'every-user-button':
-                return title, text, every_user_list, ''
-            if button_id == 'send-push-notification-button' and (user.role == 'master' or user.role == 'invest'):
-                if not title or not text or not receivers:
-                    error_output_state = ''
-                    if not title:
-                        error_output_state = 'Please enter a message title!'
-                    elif not text:
-                        error_output_state = 'Please enter a message!'
-                    elif not receivers:
-                        error_output_state = 'Please select receivers!'
-                    return title, text, receivers, error_output_state
-                else:
-                    sending_errors = send_push_notification(title, text, receivers, study_id)
-                    push_result = ["Push notification sent!", html.Br()]
-                    for error in sending_errors:
-                        push_result.extend([html.Br(), error])
-                    return '', '', [], push_result
+def push_notifications(send_button, title, text, receivers, study_id):
+    """
+    Submits a job sending the push notification on button click
+
+    :return: progress of the job or an error message and the job id, which clears the form
+    """
+    if send_button and (user.role == 'master' or user.role == 'invest'):
+        if not title:
+            return 'Please enter a message title!', dash.no_update
+        if not text:
+            return 'Please enter a message!', dash.no_update
+
+        from study.display_study.push_notification import send_push_notification_job
+        from study.display_study.ReceiverIndex import receiver_index
+
+        receivers = receiver_index.resolve(study_id, receivers or [])
+        if not receivers:
+            return 'Please select receivers!', dash.no_update
+
+        job_id = job_queue.submit('Sending push notification', send_push_notification_job, title, text, receivers, study_id)
+        return get_job_progress_div(job_id), job_id
     raise PreventUpdate
 
 
+@app.callback(Output('remove-user-list', 'options'),
+              [Input('remove-user-list', 'search_value')],
+              [State('remove-user-list', 'value'),
+               State('current-study-list', 'value')])
+def update_remove_user_options_callback(search_value, user_to_remove, study_id):
+    """
+    Fills the remove user dropdown with the ids starting with the typed text which did not leave the study
+
+    :param search_value: text typed into the dropdown
+    :param user_to_remove: selected id
+    :param study_id: selected study
+    :return: dropdown options
+    """
+    if not study_id:
+        raise PreventUpdate
+    from study.display_study.ReceiverIndex import receiver_index, not_left_ids
+
+    ids = set(receiver_index.search(study_id, not_left_ids, search_value))
+    if user_to_remove:
+        ids.add(user_to_remove)
+    return [{'label': qr_and_app, 'value': qr_and_app} for qr_and_app in sorted(ids)]
+
+
 @app.callback(Output('remove-user-output-state', 'children'),
               [Input('remove-user-confirm-dialog', 'submit_n_clicks')],
               [State('current-study-list', 'value'),
                State('remove-user-list', 'value')])
 def remove_user_callback(confirm_click, study_id, user_to_remove):
     if confirm_click:
+        from study.display_study.ReceiverIndex import receiver_index
+        from study.display_study.remove_user import remove_user
+
         remove_user(study_id, user_to_remove)
+        receiver_index.remove(study_id, user_to_remove)
         return html.Div(user_to_remove + ' has been removed.')
     else:
         raise PreventUpdate
@@ -1,19 +1,45 @@
 import os
-import dash_core_components as dcc
+import zipfile
+
 import dash_html_components as html
 import numpy as np
 
-from app import dash_study_folder, zip_file, sheets_folder
+from app import dash_study_folder, sheets_folder
 from exceptions.Exceptions import EmptyStudyTableException
 from study import open_study_json
 from study.display_study.study_data import read_study_df, get_user_list
 
+# size of the blocks in which sheets are read and sent
+zip_chunk_size = 64 * 1024
+
 
-def zip_unused_sheets(study_id):
+class ZipStreamBuffer:
 	"""
-	zip all unused study sheets in order to download it later
+	Write-only, unseekable file object for zipfile.ZipFile. Collects the written bytes until they are taken by pop, so
+	a zip file can be sent while it is being created.
+	"""
+
+	def __init__(self):
+		self.chunks = []
+
+	def write(self, data):
+		self.chunks.append(bytes(data))
+		return len(data)
+
+	def flush(self):
+		pass
+
+	def pop(self):
+		data = b''.join(self.chunks)
+		self.chunks = []
+		return data
+
 
-	:return:
+def get_unused_sheets(study_id):
+	"""
+	Sheets of all subjects which are not enrolled in the study yet
+
+	:return: sorted list of sheet paths
 	"""
 	study_json = open_study_json(study_id)
 
@@ -24,15 +50,30 @@ def zip_unused_sheets(study_id):
 		enrolled_subject_list = []
 
 	sheets_path = os.path.join(dash_study_folder, study_id, sheets_folder)
-	zip_path = os.path.join(dash_study_folder, study_id, zip_file)
-	if os.path.isfile(zip_path):
-		os.remove(zip_path)
-
 	all_subjects_pdfs = np.array(os.listdir(sheets_path))
 	enrolled_subjects_pdfs = np.array([enrolled_subject + '.pdf' for enrolled_subject in enrolled_subject_list])
-	not_enrolled_subjects_pdfs = [os.path.join(sheets_path, not_enrolled_subject) for not_enrolled_subject in np.setdiff1d(all_subjects_pdfs, enrolled_subjects_pdfs)]
+	return [os.path.join(sheets_path, not_enrolled_subject) for not_enrolled_subject in np.setdiff1d(all_subjects_pdfs, enrolled_subjects_pdfs)]
+
 
-	os.system('zip ' + zip_path + ' ' + ' '.join(not_enrolled_subjects_pdfs))
+def stream_zip(file_paths):
+	"""
+	Generator creating a zip file of the given files on the fly. The files are stored without compression (the sheets
+	are compressed pdfs already) and read in blocks, so neither a temporary file nor the whole zip is held in memory.
+
+	:param file_paths: paths of the files, stored with their file name only
+	:return: generator yielding the bytes of the zip file
+	"""
+	buffer = ZipStreamBuffer()
+	with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_STORED) as zf:
+		for file_path in file_paths:
+			zip_info = zipfile.ZipInfo.from_file(file_path, arcname=os.path.basename(file_path))
+			zip_info.compress_type = zipfile.ZIP_STORED
+			with open(file_path, 'rb') as src, zf.open(zip_info, 'w') as dst:
+				for block in iter(lambda: src.read(zip_chunk_size), b''):
+					dst.write(block)
+					yield buffer.pop()
+			yield buffer.pop()
+	yield buffer.pop()
 
 
 def get_download_unused_sheets_button(study_json):
@@ -2,7 +2,6 @@ import dash_html_components as html
 import dash_core_components as dcc
 
 from study import get_study_list_as_dict
-from study.display_study.study_table import get_user_list
 
 
 def get_current_studies_div():
@@ -34,6 +33,8 @@ def get_study_info_div(study_json, study_df):
     :return: Study information div
     """
 
+    from study.display_study.study_data import get_user_list
+
     duration = study_json["duration"]
     total_number_subjects = study_json["number-of-subjects"]
     description = study_json["description"]
@@ -50,6 +51,7 @@ def get_study_info_div(study_json, study_df):
             dcc.Input(id='create-additional-subjects-input', placeholder='Number of new subjects', type='number',
                       min='0'),
             html.Button(id='create-additional-subjects-button', children='Create new subjects')]),
+        html.Div(id='create-subject-job-div'),
         html.P('Number of enrolled subjects: ' + str(n_enrolled_users)),
         active_sensors_div,
         ema_active_json
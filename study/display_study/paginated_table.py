@@ -0,0 +1,214 @@
+import math
+
+import dash_core_components as dcc
+import dash_html_components as html
+import dash_table
+import numpy as np
+import pandas as pd
+
+from study.display_study.study_data import get_display_columns, subject_column, format_study_df, format_column
+from study.display_study.StudyStatusCache import study_status_cache
+from study.display_study.study_table import get_color_legend, get_status_code_legend
+
+page_size = 50
+# studies with more rows than this are displayed in a server side paginated data table instead of a html table
+paginated_table_min_rows = 1000
+
+# background colors of highlighted cells, corresponding to the td classes in assets/table.css
+highlight_colors = {
+	'blue': '#34b4eb',
+	'light-green': '#7cfc00',
+	'dark-green': '#006400',
+	'red': '#ff3333',
+	'orange': '#f58300'
+}
+
+highlight_filter_options = [
+	{'label': 'No data sent for 2 days', 'value': 'red'},
+	{'label': 'Left study too early', 'value': 'blue'},
+	{'label': 'Study duration reached, not left', 'value': 'light-green'},
+	{'label': 'Study duration reached, left', 'value': 'dark-green'},
+	{'label': 'Multiple QR Codes of one user active', 'value': 'orange'}
+]
+
+# operators of data table filter queries
+filter_operators = {'>=': 'ge', 'ge': 'ge', '<=': 'le', 'le': 'le', '<': 'lt', 'lt': 'lt', '>': 'gt', 'gt': 'gt',
+					'!=': 'ne', 'ne': 'ne', '=': 'eq', 'eq': 'eq', 'contains': 'contains', 'datestartswith': 'datestartswith'}
+
+
+def get_paginated_study_data_table(study_json, study_df):
+	"""
+	Returns a div containing an empty data table which is filled page by page by the server (see get_study_table_page).
+	Used instead of get_study_data_table for large studies.
+
+	:return: Data table div and dicts containing ids with missing data, active ids and not left ids per modality
+	"""
+	_, missing_data_dict, active_users_dict, not_left_users_dict = study_status_cache.get(study_json, study_df)
+
+	columns = [{'name': 'user', 'id': 'user', 'presentation': 'markdown'}] + \
+			  [{'name': col, 'id': col} for col in get_display_columns(study_df)]
+
+	study_table = dash_table.DataTable(id='study-data-table', columns=columns, data=[],
+									   page_action='custom', page_current=0, page_size=page_size,
+									   sort_action='custom', sort_mode='multi', sort_by=[],
+									   filter_action='custom', filter_query='',
+									   style_header={'backgroundColor': '#004176', 'color': 'white'},
+									   style_table={'overflowX': 'auto'})
+
+	return html.Div(id='study-table-and-legend-div', children=[
+		html.Div(id='study-table-filter-div', children=dcc.Dropdown(id='study-table-highlight-filter',
+																	options=highlight_filter_options, multi=True,
+																	placeholder='Only highlighted rows...')),
+		html.Div(id='study-data-table-div', children=study_table),
+		html.Div(id='legend-div', className='row', children=[
+			html.Div(id='color-legend-div', children=get_color_legend()),
+			html.Div(id='status-code-legend-div', children=get_status_code_legend())])]), missing_data_dict, active_users_dict, not_left_users_dict
+
+
+def get_study_table_page(study_json, study_df, page_current, page_size, sort_by, filter_query, highlights):
+	"""
+	Filters, sorts and slices the study data frame and returns only the rows of the requested page. The status of the
+	rows is computed once per cached study data frame (see StudyStatusCache) and only sliced here.
+
+	:param study_json: study json
+	:param study_df: study data frame
+	:param page_current: index of the requested page
+	:param page_size: number of rows per page
+	:param sort_by: list of dicts with column_id and direction
+	:param filter_query: filter query of the data table
+	:param highlights: list of highlight colors, only rows with one of these highlights are kept
+	:return: page records, number of pages and conditional styles of the page
+	"""
+	status_df = study_status_cache.get(study_json, study_df)[0]
+	red_columns = [col for col in status_df.columns if col != 'id']
+
+	mask = get_filter_mask(study_df, filter_query)
+	if highlights:
+		highlight_mask = status_df['id'].isin(highlights)
+		if 'red' in highlights:
+			highlight_mask |= status_df[red_columns].any(axis=1)
+		mask &= highlight_mask
+
+	page_df = study_df[mask]
+	if sort_by:
+		page_df = page_df.sort_values(by=[get_data_column(sort['column_id']) for sort in sort_by],
+									  ascending=[sort['direction'] == 'asc' for sort in sort_by],
+									  key=get_sort_key, kind='mergesort')
+
+	page_count = max(math.ceil(len(page_df.index) / page_size), 1)
+	page_df = page_df.iloc[page_current * page_size:(page_current + 1) * page_size]
+	page_status_df = status_df.loc[page_df.index]
+
+	records = format_study_df(page_df).to_dict('records')
+	for record, subject in zip(records, page_df[subject_column]):
+		record['user'] = '[' + subject + '](download-' + study_json["name"] + '-' + subject + ')'
+
+	return records, page_count, get_page_styles(page_status_df, red_columns)
+
+
+def get_page_styles(page_status_df, red_columns):
+	"""
+	Conditional styles highlighting the cells of one page
+
+	:param page_status_df: rows of the status data frame which are displayed on the page
+	:param red_columns: last_time_received columns of the status data frame
+	:return: list of style_data_conditional entries
+	"""
+	styles = []
+	red_cells = page_status_df[red_columns].to_numpy()
+	for row_index, id_color in enumerate(page_status_df['id']):
+		if id_color:
+			styles.append(get_cell_style(row_index, 'id', id_color))
+		for col_index in np.flatnonzero(red_cells[row_index]):
+			styles.append(get_cell_style(row_index, red_columns[col_index], 'red'))
+	return styles
+
+
+def get_cell_style(row_index, column_id, color):
+	return {'if': {'row_index': row_index, 'column_id': column_id}, 'backgroundColor': highlight_colors[color]}
+
+
+def get_filter_mask(study_df, filter_query):
+	"""
+	Evaluates the filter query of the data table, expressions are combined with ' && '
+
+	:param study_df: study data frame
+	:param filter_query: filter query, e.g. '{app} = main && {status_code} > 0'
+	:return: boolean series
+	"""
+	mask = pd.Series(True, index=study_df.index)
+	for filter_part in (filter_query or '').split(' && '):
+		col_name, operator, value = split_filter_part(filter_part)
+		col_name = get_data_column(col_name)
+		if col_name not in study_df.columns:
+			continue
+
+		column = study_df[col_name]
+		if operator == 'contains':
+			mask &= format_column(column).str.contains(str(value), regex=False)
+		elif operator == 'datestartswith':
+			mask &= format_column(column).str.startswith(str(value))
+		elif operator in ('eq', 'ne', 'lt', 'le', 'gt', 'ge'):
+			if col_name == 'time_in_study':
+				# compared as the duration it is sorted by, numbers are days
+				column = get_sort_key(column)
+				if isinstance(value, float):
+					value = pd.to_timedelta(value, unit='D')
+				else:
+					value = pd.to_timedelta(str(value), errors='coerce')
+			elif pd.api.types.is_datetime64_any_dtype(column):
+				value = pd.to_datetime(str(value), errors='coerce')
+			elif not (pd.api.types.is_numeric_dtype(column) and isinstance(value, float)):
+				column = format_column(column)
+				value = str(value)
+			mask &= getattr(column, operator)(value)
+	return mask
+
+
+def split_filter_part(filter_part):
+	"""
+	Splits one filter expression of the data table into column, operator and value
+
+	:param filter_part: filter expression, e.g. '{n_batches} > 10'
+	:return: column name, operator name and value. All None if the expression is invalid
+	"""
+	filter_part = filter_part.strip()
+	if not filter_part.startswith('{') or '}' not in filter_part:
+		return None, None, None
+
+	name, expression = filter_part[1:].split('}', 1)
+	operator, _, value_part = expression.strip().partition(' ')
+	operator = filter_operators.get(operator) or filter_operators.get(operator[1:])
+	if operator is None:
+		return None, None, None
+
+	value_part = value_part.strip()
+	if len(value_part) > 1 and value_part[0] == value_part[-1] and value_part[0] in ('"', "'", '`'):
+		value = value_part[1: -1].replace('\\' + value_part[0], value_part[0])
+	elif operator in ('contains', 'datestartswith'):
+		value = value_part
+	else:
+		try:
+			value = float(value_part)
+		except ValueError:
+			value = value_part
+
+	return name, operator, value
+
+
+def get_data_column(column_id):
+	return subject_column if column_id == 'user' else column_id
+
+
+def get_sort_key(column):
+	"""
+	Typed columns are sorted by value, time in study by its duration and all other columns as strings
+
+	:param column: column to be sorted
+	:return: sortable column
+	"""
+	if column.name == 'time_in_study':
+		return pd.to_timedelta(column.replace('', np.nan), errors='coerce')
+	if pd.api.types.is_object_dtype(column):
+		return column.astype(str)
+	return column
@@ -1,27 +1,32 @@
 import json
 import os
 
-import requests
-
 import dash_html_components as html
 import dash_core_components as dcc
 
 from app import users_folder
-from study import sep, main, ema, modalities
-from study.display_study.study_data import get_ids_and_app_list
+from study import sep, main, ema, modalities, suffix_per_modality_dict
+from monitoring.Profiler import profiled
+from study.display_study.FirebaseDispatcher import firebase_dispatcher
+from study.display_study.UserIndex import user_index
+from study.display_study.ReceiverIndex import get_group_options
 
-firebase_url = 'https://fcm.googleapis.com/fcm/send'
+firebase_url = os.environ.get('FIREBASE_URL', 'https://fcm.googleapis.com/fcm/send')
 firebase_auth = {
     main: 'key=AAAAGJjFsA8:APA91bEdNt46erqI5TgplhsqqqKeyjIBQcG5Pb49h7QMW0V9XqPoHwbW4Oxo7lI9wZkkY7gSStO0M1QaCn7-Ijqj1EmYfrCwNkcPR-qv8MPKoTBWhuIvd0JGFMukUz2EstAkR-90EzVV',
     ema: 'key=AAAAqONfb68:APA91bGUjq7VcWizetjZ9BGU3WWwtRHhVHVVMtn1F_5XKFm1yZSWiYw4nC0kl5guyUbwHLEQ7V1rpLqMDi_xXjd5q3UUKBCjnHTJIymAM0UBhfwS4g7mdL9aAtqSb8SyckaJtA5XT1my'
 }
-firebase_content_type = 'application/json'
+# firebase errors of tokens which belong to uninstalled apps or are malformed, these tokens are not used again
+invalid_token_errors = ('NotRegistered', 'InvalidRegistration')
 
 
-def get_push_notification_div(missing_data_dict, active_users_dict):
-    qr_and_app_list = get_ids_and_app_list(active_users_dict)
-    missing_ids_list = get_ids_and_app_list(missing_data_dict)
+def get_push_notification_div():
+    """
+    Push notification form, the receiver options are searched on the server as the user types (see ReceiverIndex).
+    The autofill buttons select a group of ids, which is resolved on the server when the notification is sent.
 
+    :return: push notification div
+    """
     return html.Div(id='push-notification', children=[
         html.H3('Push notifications'),
         html.Div(id='push-notification-information-div', children=[
@@ -30,49 +35,148 @@ def get_push_notification_div(missing_data_dict, active_users_dict):
             html.Div(id='push-notification-text-div',
                      children=dcc.Textarea(id='push-notification-text', placeholder='Message text')),
             html.Div(id='push-notification-receiver-list-div', children=[
-                dcc.Dropdown(id='receiver-list', options=[{'label': qr_and_app, 'value': qr_and_app} for qr_and_app in qr_and_app_list], multi=True, placeholder='Receiver...')])]),
+                dcc.Dropdown(id='receiver-list', options=get_group_options(), multi=True, placeholder='Receiver...')])]),
         html.Div(id='autofill-button-div', children=[
-            html.Button(id='every-user-button', children='All IDs',
-                        **{'data-user-list': qr_and_app_list}),
-            html.Button(id='user-with-missing-data-button', children='Missing data IDs',
-                        **{'data-user-list': missing_ids_list})]),
+            html.Button(id='every-user-button', children='All IDs'),
+            html.Button(id='user-with-missing-data-button', children='Missing data IDs')]),
         html.Button(id='send-push-notification-button', children='Send notification'),
+        # id of the last job sending a push notification
+        dcc.Store(id='push-notification-sent'),
         html.Div(id='push-notification-output-state')
     ])
 
 
-def send_push_notification(title, text, receivers, study_id):
+@profiled
+def send_push_notification(title, text, receivers, study_id, progress=None):
+    """
+    Sends a push notification to the receivers, the messages of both modalities are sent concurrently in batches.
+    Receivers sharing a token (several activations on one device) are sent one message, its result applies to all of
+    them. Tokens reported as invalid by firebase are marked in the user jsons and skipped by later notifications.
+
+    :param title: message title
+    :param text: message text
+    :param receivers: list of receivers, each is <qr code id><sep><modality>
+    :param study_id: study of the receivers
+    :param progress: optional function called with the number of sent tokens and the total number of tokens
+    :return: number of receivers the notification was delivered to and list of error messages
+    """
     sending_errors = []
+    messages = []
+    receivers_per_message = []
+    user_index.refresh_if_changed(study_id)
     for modality in modalities:
         receivers_per_modality = [str(receiver).split(sep)[0] for receiver in receivers if str(receiver).split(sep)[1] == modality]
 
         if len(receivers_per_modality) > 0:
-            tokens, errors = get_receivers_tokens(receivers_per_modality, study_id, modality)
-            body = {
-                'data': {
-                    'title': title,
-                    'body': text
-                },
-                'registration_ids': tokens
-            }
-
-            requests.post(firebase_url, headers={'Authorization': firebase_auth[modality], 'Content-Type': firebase_content_type}, json=body)
+            receivers_per_token, errors = get_receivers_tokens(receivers_per_modality, study_id, modality)
+            if receivers_per_token:
+                messages.append((firebase_auth[modality], {'title': title, 'body': text}, list(receivers_per_token)))
+                receivers_per_message.append((modality, receivers_per_token))
             sending_errors.extend(errors)
-    return sending_errors
+
+    delivered = 0
+    invalid_tokens = {modality: {} for modality in modalities}
+    for batch in firebase_dispatcher.send(firebase_url, messages, progress):
+        modality, receivers_per_token = receivers_per_message[batch['message']]
+        if batch['error']:
+            results = [{'error': batch['error']}] * len(batch['tokens'])
+        else:
+            results = batch['response'].get('results', [])
+
+        for token, result in zip(batch['tokens'], results):
+            for receiver in receivers_per_token[token]:
+                if 'error' in result:
+                    sending_errors.append(get_sending_error(receiver, modality, result['error']))
+                    if result['error'] in invalid_token_errors:
+                        invalid_tokens[modality][receiver] = token
+                else:
+                    delivered += 1
+
+    for modality, invalid_tokens_per_receiver in invalid_tokens.items():
+        mark_invalid_tokens(study_id, modality, invalid_tokens_per_receiver)
+    return delivered, sending_errors
+
+
+def send_push_notification_job(title, text, receivers, study_id, progress=None):
+    """
+    send_push_notification as job of the job queue
+
+    :return: messages displayed when the job is finished
+    """
+    delivered, sending_errors = send_push_notification(title, text, receivers, study_id, progress)
+    return ["Push notification delivered to " + str(delivered) + " of " + str(len(receivers)) + " receivers!"] + sending_errors
 
 
 def get_receivers_tokens(receivers, study_id, modality):
-    tokens = []
+    """
+    Looks up the tokens of the receivers in the user index, which has to be refreshed before. The index only holds
+    receivers whose qr code id follows the naming of create_subjects, user jsons of other receivers are read directly.
+
+    :param receivers: qr code ids of the receivers
+    :param study_id: study of the receivers
+    :param modality: app the notification is sent to
+    :return: dict of the list of receivers per push token and list of error messages of receivers without valid token
+    """
+    receivers_per_token = {}
     errors = []
+    tokens = user_index.get_tokens(study_id, modality)
 
     for receiver in receivers:
-        receiver_json_path = os.path.join(users_folder, study_id + '_' + receiver + '.json')
-        with open(receiver_json_path, 'r') as f:
-            receiver_json = json.load(f)
-        if modality == main and 'pushNotification_token' in receiver_json:
-            tokens.append(receiver_json["pushNotification_token"])
-        elif modality == ema and 'pushNotification_token_ema' in receiver_json:
-            tokens.append(receiver_json["pushNotification_token_ema"])
+        if receiver in tokens:
+            token, invalid_token = tokens[receiver]
         else:
-            errors.append("Sending to: " + receiver + sep + modality + " was not successful!")
-    return tokens, errors
+            token, invalid_token = read_receiver_tokens(study_id, receiver, modality)
+        if not token:
+            errors.append(get_sending_error(receiver, modality))
+        elif token == invalid_token:
+            errors.append(get_sending_error(receiver, modality, 'App not installed anymore'))
+        else:
+            receivers_per_token.setdefault(token, []).append(receiver)
+    return receivers_per_token, errors
+
+
+def read_receiver_tokens(study_id, receiver, modality):
+    """
+    :return: push token and invalid token stored in the user json of the receiver, None if not set
+    """
+    try:
+        with open(get_receiver_json_path(study_id, receiver)) as f:
+            receiver_json = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None, None
+    return receiver_json.get(get_token_key(modality)), receiver_json.get(get_token_key(modality) + '_invalid')
+
+
+def mark_invalid_tokens(study_id, modality, invalid_tokens_per_receiver):
+    """
+    Stores invalid tokens in the user jsons. A token is only skipped as long as the app did not register a new one.
+
+    :param study_id: study of the receivers
+    :param modality: app of the tokens
+    :param invalid_tokens_per_receiver: dict of invalid token per qr code id
+    :return:
+    """
+    invalid_key = get_token_key(modality) + '_invalid'
+    for receiver, token in invalid_tokens_per_receiver.items():
+        receiver_json_path = get_receiver_json_path(study_id, receiver)
+        with open(receiver_json_path) as f:
+            receiver_json = json.load(f)
+
+        receiver_json[invalid_key] = token
+
+        with open(receiver_json_path, 'w') as f:
+            json.dump(receiver_json, f, ensure_ascii=False, indent=4)
+        user_index.update_receiver(study_id, receiver)
+
+
+def get_receiver_json_path(study_id, receiver):
+    return os.path.join(users_folder, study_id + '_' + receiver + '.json')
+
+
+def get_token_key(modality):
+    return 'pushNotification_token' + suffix_per_modality_dict[modality]
+
+
+def get_sending_error(receiver, modality, reason=None):
+    error = "Sending to: " + receiver + sep + modality + " was not successful!"
+    return error + " (" + reason + ")" if reason else error
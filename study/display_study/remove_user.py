@@ -3,22 +3,24 @@ import time
 
 from app import users_folder
 from study import timestamp_format, sep, suffix_per_modality_dict, remove_status_code
-from study.display_study.study_data import get_ids_and_app_list
+from study.display_study.UserIndex import user_index
 import dash_html_components as html
 import dash_core_components as dcc
 import os
 from datetime import datetime
 
 
-def get_remove_users_div(not_left_users_dict):
-
-    not_left_user_list = get_ids_and_app_list(not_left_users_dict)
+def get_remove_users_div():
+    """
+    Remove user form, the options of the dropdown are searched on the server as the user types (see ReceiverIndex)
 
+    :return: remove user div
+    """
     return html.Div(id='remove-user', children=[
         html.H3('Remove user'),
         html.Div(id='remove-user-div', children=[
             html.Div(id='remove-user-list-div', children=[
-                dcc.Dropdown(id='remove-user-list', options=[{'label': qr_and_app, 'value': qr_and_app} for qr_and_app in not_left_user_list], multi=False, placeholder='User to be removed...')])]),
+                dcc.Dropdown(id='remove-user-list', options=[], multi=False, placeholder='User to be removed...')])]),
 
         html.Button(id='remove-user-button', children='Remove user from study'),
         html.P(id='remove-user-output-state'),
@@ -43,3 +45,4 @@ def remove_user(study_id, user_to_remove):
 
     with open(user_json_path, 'w') as f:
         json.dump(user_data, f, ensure_ascii=False, indent=4)
+    user_index.update_receiver(study_id, user)
@@ -5,47 +5,200 @@ import numpy as np
 
 from app import storage_folder, csv_prefix
 from exceptions.Exceptions import EmptyStudyTableException
-from study import ema, table_columns, sensors_per_modality_dict, main, sep
+from monitoring.Profiler import profiled
+from study import ema, table_columns, sensors_per_modality_dict, main, sep, get_study_json_path, timestamp_format
+from study.display_study.StudyDataCache import study_df_cache
+
+# column holding the subject key of each registration id, used for grouping only and not displayed
+subject_column = 'subject'
+
+timestamp_columns = ['date_registered', 'date_left_study']
+count_columns = ['status_code']
+categorical_columns = ['app', subject_column]
+
+# columns which are read as strings, all other columns are numeric
+csv_dtypes = {col: str for col in table_columns if not col.endswith(' n_batches') and col != 'status_code'}
+
+# number of csv rows parsed at once, bounds the memory needed for untyped csv data
+csv_chunk_rows = 100000
+
+
+def get_study_csv_path(study_id):
+    return os.path.join(storage_folder, csv_prefix + study_id + '.csv')
 
 
 def read_study_df(study_json):
-    study_csv = os.path.join(storage_folder, csv_prefix + study_json["name"] + '.csv')
-    study_df = pd.read_csv(study_csv)
+    """
+    Returns the processed data frame of the study. Frames are cached as long as the study csv and the study json
+    did not change, the returned frame must therefore not be modified.
 
-    study_df = study_df.reindex(columns=table_columns)
-    study_df = study_df.rename(columns={"subject_name": "id"})
-    study_df = drop_unused_data(study_json, study_df)
-    study_df = study_df.replace(to_replace=[np.nan, 'none', 0], value='')
-    study_df = study_df.sort_values(by=['app', 'id']).reset_index(drop=True)
+    :param study_json: study json
+    :return: study data frame
+    """
+    study_id = study_json["name"]
+    study_df = study_df_cache.get(study_id, get_study_files_signature(study_id), lambda: load_study_df(study_json))
     if len(study_df.index) == 0:
         raise EmptyStudyTableException
 
     return study_df
 
 
-def drop_unused_data(study_json, study_df):
+def get_study_files_signature(study_id):
     """
-    Drops columns of sensors which are not selected in the study. Only if completely empty (-> if actual unused sensors contain
-    data they will be highlighted)
+    Signature of the files a study data frame is created from. Raises FileNotFoundError if the study csv does not exist
 
-    :param study_df: data frame of study
-    :return: edited data frame without unused sensors
+    :param study_id: study name
+    :return: tuple of modification times and sizes of study csv and study json
     """
+    csv_stat = os.stat(get_study_csv_path(study_id))
+    json_stat = os.stat(get_study_json_path(study_id))
+    return csv_stat.st_mtime_ns, csv_stat.st_size, json_stat.st_mtime_ns, json_stat.st_size
 
-    unused_data = np.setdiff1d(sensors_per_modality_dict[main], study_json["sensor-list"]) if 'sensor-list' in study_json else sensors_per_modality_dict[main]
-    if 'survey' not in study_json:
-        unused_data = np.concatenate((unused_data, sensors_per_modality_dict[ema]), axis=None)
 
-    for data in unused_data:
-        study_df[data + ' n_batches'] = study_df[data + ' n_batches'].replace(to_replace=[0], value=np.nan)
-        study_df[data + ' last_time_received'] = study_df[data + ' last_time_received'].replace(to_replace=['none'],
-                                                                                                    value=np.nan)
-    study_df = pd.DataFrame.dropna(study_df, axis=1, how='all')
+@profiled
+def load_study_df(study_json):
+    return read_study_csv(get_study_csv_path(study_json["name"]), study_json)
+
+
+def read_study_csv(study_csv, study_json):
+    """
+    Reads the study csv in chunks of csv_chunk_rows rows. Only the columns required by the study are read (see
+    get_study_columns) and every chunk is converted to the typed layout right away, so at most one chunk of untyped csv
+    data is held in memory. Columns which are completely empty are dropped.
+
+    :param study_csv: path of the study csv
+    :param study_json: study json
+    :return: typed study data frame sorted by app and id
+    """
+    study_columns = set(get_study_columns(study_json))
+    columns_with_data = set()
+    chunks = []
+
+    reader = pd.read_csv(study_csv, usecols=lambda col: col in study_columns, dtype=csv_dtypes, chunksize=csv_chunk_rows)
+    for chunk in reader:
+        columns_with_data.update(chunk.columns[chunk.notna().any()])
+        chunks.append(apply_study_dtypes(chunk))
+
+    study_df = pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame(columns=table_columns)
+    if len(study_df.index) == 0:
+        return study_df
+
+    study_df = study_df[[col for col in table_columns if col in columns_with_data]]
+    study_df = study_df.rename(columns={"subject_name": "id"})
+    study_df[subject_column] = get_subject_keys(study_df['id']) if 'id' in study_df.columns else ''
+    for col in categorical_columns:
+        if col in study_df.columns:
+            study_df[col] = study_df[col].astype('category')
+    study_df = study_df.sort_values(by=['app', 'id']).reset_index(drop=True)
     return study_df
 
 
+def get_study_columns(study_json):
+    """
+    Columns of table_columns needed for the study: the columns of the sensors in the sensor-list, the ema columns if
+    the study has a survey and all columns which do not belong to a sensor
+
+    :param study_json: study json
+    :return: list of column names
+    """
+    unused_columns = set(sensor + suffix for sensor in get_unused_sensors(study_json)
+                         for suffix in (' n_batches', ' last_time_received'))
+    return [col for col in table_columns if col not in unused_columns]
+
+
+def apply_study_dtypes(study_df):
+    """
+    Converts the columns of the study data frame to a compact typed layout: timestamps become datetime64 (NaT if empty),
+    batch counts and status codes become small integers (0 if empty) and all other columns strings ('' if empty).
+    App and subject key are made categorical by read_study_csv after all chunks are read.
+    Display strings are only created when rendering, see format_study_df.
+
+    :param study_df: study data frame as read from the csv
+    :return: typed study data frame
+    """
+    for col in study_df.columns:
+        if col in timestamp_columns or col.endswith(' last_time_received'):
+            study_df[col] = pd.to_datetime(study_df[col], format=timestamp_format, errors='coerce')
+        elif col in count_columns or col.endswith(' n_batches'):
+            study_df[col] = pd.to_numeric(pd.to_numeric(study_df[col], errors='coerce').fillna(0).astype('int64'),
+                                          downcast='integer')
+        else:
+            study_df[col] = study_df[col].fillna('').replace(to_replace=['none'], value='')
+    return study_df
+
+
+def format_study_df(study_df):
+    """
+    Formats the displayed columns of the typed study data frame to display strings. Missing timestamps and counts of 0
+    are displayed as empty cells.
+
+    :param study_df: typed study data frame (or a slice of it)
+    :return: data frame with display values
+    """
+    display_df = pd.DataFrame(index=study_df.index)
+    for col in get_display_columns(study_df):
+        display_df[col] = format_column(study_df[col])
+    return display_df
+
+
+def format_column(column):
+    if pd.api.types.is_datetime64_any_dtype(column):
+        return column.dt.strftime(timestamp_format).fillna('')
+    if pd.api.types.is_integer_dtype(column):
+        return column.astype(object).where(column != 0, '')
+    return column.astype(str)
+
+
+def get_unused_sensors(study_json):
+    """
+    Sensors which are not selected in the study
+
+    :param study_json: study json
+    :return: list of sensor names
+    """
+    unused_sensors = list(np.setdiff1d(sensors_per_modality_dict[main], study_json["sensor-list"])) if 'sensor-list' in study_json else list(sensors_per_modality_dict[main])
+    if 'survey' not in study_json:
+        unused_sensors.extend(sensors_per_modality_dict[ema])
+    return unused_sensors
+
+
+def get_subject_keys(ids):
+    """
+    Derives the subject key of every registration id, i.e. the id without its activation number
+
+    :param ids: series of registration ids
+    :return: series of subject keys
+    """
+    return ids.astype(str).str.extract(r'^(.*)_[^_]*$', expand=False).fillna('')
+
+
 def get_user_list(study_df):
-    return np.sort(np.unique(['_'.join(str(registration_id).split('_')[:-1]) for registration_id in study_df['id']]))
+    return np.sort(np.asarray(study_df[subject_column].cat.categories))
+
+
+def get_subject_groups(study_df):
+    """
+    Splits the study data frame into subjects with a single groupby on the subject key column
+
+    :param study_df: study data frame
+    :return: list of (subject, row positions) tuples sorted by subject, positions keep the order of the data frame
+    """
+    return sorted(study_df.groupby(subject_column, sort=False, observed=True).indices.items())
+
+
+def get_active_registrations(study_df, not_left):
+    """
+    Counts the active registrations (qr codes which did not leave the study) per subject and app
+
+    :param study_df: study data frame
+    :param not_left: boolean series marking rows which did not leave the study
+    :return: series containing for each row the number of active registrations of the same subject and app
+    """
+    return not_left.groupby([study_df[subject_column], study_df['app']], observed=True).transform('sum')
+
+
+def get_display_columns(study_df):
+    return [col for col in study_df.columns if col != subject_column]
 
 
 def get_ids_and_app_list(users_per_app_dict):
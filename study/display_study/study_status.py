@@ -0,0 +1,76 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from study import modalities, sensors_per_modality_dict
+from study.display_study.study_data import get_active_registrations
+
+# number of days without received data until a sensor is highlighted
+missing_data_days = 2
+
+
+def get_study_status(study_json, study_df):
+	"""
+	Classifies all rows of the study data frame at once. Computes the highlight color of every id cell and a flag for
+	every last_time_received cell which has to be highlighted red:
+	red: delayed sensor data (>= 2 days)
+	orange: multiple qr codes of one user active
+	light-green: study duration reached, but not left
+	dark-green: study duration reached, left
+	blue: left prematurely
+
+	:param study_json: study json
+	:param study_df: study data frame
+	:return: status data frame (column 'id' holds the id color, the last_time_received columns hold the red flags) and
+			dicts containing the ids with missing data, the active ids and the ids which did not leave the study per modality
+	"""
+	ids = study_df['id']
+	apps = study_df['app']
+	study_duration = int(study_json["duration"])
+
+	time_registered = study_df['date_registered']
+	time_left = study_df['date_left_study']
+	not_left = time_left.isna()
+	time_last_possible_batch = time_left.fillna(pd.Timestamp(datetime.now()))
+
+	status_df = pd.DataFrame(index=study_df.index)
+	for sensor in get_table_sensors(study_df):
+		ltr = sensor + ' last_time_received'
+		time_ltr = study_df[ltr].fillna(time_registered)
+		apps_with_sensor = [modality for modality in modalities if sensor in sensors_per_modality_dict[modality]]
+		days_since_last_received = (time_last_possible_batch - time_ltr).dt.days
+		status_df[ltr] = apps.isin(apps_with_sensor) & (days_since_last_received >= missing_data_days)
+
+	missing_data_rows = status_df.any(axis=1) & not_left
+	multi_registration_rows = not_left & (get_active_registrations(study_df, not_left) > 1)
+	days_in_study = pd.to_numeric(study_df['time_in_study'].astype(str).str.split(' ').str[0], errors='coerce')
+	days_until_left = (time_left - time_registered).dt.days
+
+	status_df['id'] = np.select([multi_registration_rows,
+								 not_left & (days_in_study > study_duration),
+								 missing_data_rows,
+								 ~not_left & (days_until_left >= study_duration),
+								 ~not_left & (days_until_left < study_duration)],
+								['orange', 'light-green', 'red', 'dark-green', 'blue'], default='')
+
+	missing_data = get_ids_per_modality(ids, apps, missing_data_rows)
+	active_users = get_ids_per_modality(ids, apps, not_left)
+	not_left_users = get_ids_per_modality(ids, apps, not_left)
+
+	return status_df, missing_data, active_users, not_left_users
+
+
+def get_table_sensors(study_df):
+	"""
+	Sensors which are displayed in the table, i.e. sensors with batch count and last received column
+
+	:param study_df: study data frame
+	:return: list of sensor names
+	"""
+	return [col.split(' ')[0] for col in study_df.columns
+			if col.endswith(' n_batches') and col.split(' ')[0] + ' last_time_received' in study_df.columns]
+
+
+def get_ids_per_modality(ids, apps, mask):
+	return {modality: set(ids[mask & (apps == modality)]) for modality in modalities}
@@ -0,0 +1,134 @@
+import fcntl
+import json
+import os
+import re
+import threading
+import time
+import uuid
+
+from app import uploads_folder, upload_max_bytes
+from exceptions.Exceptions import UploadNotFoundException, UploadTooLargeException
+
+# bytes read from the request stream at once
+upload_read_size = 1024 * 1024
+# unused uploads are removed after this many seconds
+upload_retention = 24 * 60 * 60
+
+
+class UploadStore:
+    """
+    Files uploaded in chunks by the browser (assets/chunked-upload.js). Every chunk is appended to the file of its
+    upload directly from the request stream, so the memory usage does not depend on the file size. An upload is
+    identified by a random id, the handle which is kept in the dash stores until the uploaded file is used.
+    The folder is created and old uploads are removed when the first upload is started.
+    """
+
+    def __init__(self, folder, max_bytes):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.prepared = False
+        self.lock = threading.Lock()
+
+    def prepare(self):
+        with self.lock:
+            if not self.prepared:
+                os.makedirs(self.folder, exist_ok=True)
+                self.remove_old_uploads()
+                self.prepared = True
+
+    def start(self, filename, size, user_name):
+        """
+        :param filename: name of the uploaded file
+        :param size: size of the file in bytes
+        :param user_name: user uploading the file, only this user can add chunks
+        :return: id of the upload
+        """
+        if size < 0 or size > self.max_bytes:
+            raise UploadTooLargeException
+        self.prepare()
+        upload_id = uuid.uuid4().hex
+        open(self.get_path(upload_id, '.part'), 'wb').close()
+        with open(self.get_path(upload_id, '.json'), 'w') as f:
+            json.dump({'filename': os.path.basename(filename), 'size': size, 'user': user_name, 'created': time.time()}, f)
+        return upload_id
+
+    def append(self, upload_id, offset, stream):
+        """
+        Writes the chunk of the stream to the upload if it starts at the end of the already received bytes
+
+        :param upload_id: id of the upload
+        :param offset: position of the chunk in the file
+        :param stream: file like object containing the chunk
+        :return: number of received bytes, unchanged if the offset did not match
+        """
+        info = self.get_info(upload_id)
+        if info is None:
+            raise UploadNotFoundException
+        if offset != info['received']:
+            return info['received']
+
+        try:
+            f = open(self.get_path(upload_id, '.part'), 'r+b')
+        except FileNotFoundError:
+            raise UploadNotFoundException
+        with f:
+            # chunks of the same upload (retried requests, several tabs) are written one after another, also by
+            # different dashboard processes, and the offset is checked again once the lock is held
+            fcntl.flock(f, fcntl.LOCK_EX)
+            received = f.seek(0, os.SEEK_END)
+            if offset != received:
+                return received
+            while True:
+                block = stream.read(upload_read_size)
+                if not block:
+                    break
+                received += len(block)
+                if received > info['size']:
+                    f.truncate(offset)
+                    raise UploadTooLargeException
+                f.write(block)
+        return received
+
+    def get_info(self, upload_id):
+        """
+        :param upload_id: id of the upload
+        :return: dict with filename, size, user, creation time and number of received bytes, None if the upload does
+                 not exist
+        """
+        if not re.fullmatch('[0-9a-f]{32}', str(upload_id)):
+            return None
+        try:
+            with open(self.get_path(upload_id, '.json')) as f:
+                info = json.load(f)
+            info['received'] = os.path.getsize(self.get_path(upload_id, '.part'))
+        except (FileNotFoundError, ValueError):
+            return None
+        return info
+
+    def get_file(self, upload_id):
+        """
+        :param upload_id: id of the upload
+        :return: path of the completely uploaded file, raises UploadNotFoundException otherwise
+        """
+        info = self.get_info(upload_id)
+        if info is None or info['received'] != info['size']:
+            raise UploadNotFoundException
+        return self.get_path(upload_id, '.part')
+
+    def remove(self, upload_id):
+        for extension in ('.part', '.json'):
+            try:
+                os.remove(self.get_path(upload_id, extension))
+            except FileNotFoundError:
+                pass
+
+    def get_path(self, upload_id, extension):
+        return os.path.join(self.folder, upload_id + extension)
+
+    def remove_old_uploads(self):
+        for entry in os.scandir(self.folder):
+            if entry.stat().st_mtime < time.time() - upload_retention:
+                os.remove(entry.path)
+
+
+upload_store = UploadStore(uploads_folder, upload_max_bytes)
@@ -0,0 +1,25 @@
+import dash_core_components as dcc
+import dash_html_components as html
+
+from app import upload_chunk_size
+
+
+def get_chunked_upload(upload_id, text, accept=None):
+    """
+    File selection (by click or drag and drop) uploading the file in chunks to /uploads, see assets/chunked-upload.js.
+    The handle of the finished upload becomes the value of the hidden input <upload_id>-handle.
+
+    :param upload_id: id of the upload area
+    :param text: text displayed in the upload area
+    :param accept: accepted file types
+    :return: upload div
+    """
+    upload_props = {'data-handle': upload_id + '-handle', 'data-chunk-size': upload_chunk_size}
+    if accept:
+        upload_props['data-accept'] = accept
+
+    return html.Div(id=upload_id, className='upload chunked-upload', children=[
+        html.Div(text),
+        html.Div(className='chunked-upload-status'),
+        dcc.Input(id=upload_id + '-handle', type='text', className='chunked-upload-handle', value='')
+    ], **upload_props)
@@ -0,0 +1,69 @@
+from flask import jsonify, request, abort
+
+from app import app, user
+from exceptions.Exceptions import UploadNotFoundException, UploadTooLargeException
+from uploads.UploadStore import upload_store
+
+
+@app.server.route('/uploads', methods=['POST'])
+def start_upload():
+    """
+    Starts a chunked upload, expects json with filename and size. Only available for the role master.
+
+    :return: json with id of the upload and received bytes, 413 if the file is too large
+    """
+    if user.role != 'master':
+        abort(403)
+    data = request.get_json(silent=True) or {}
+    try:
+        size = int(data['size'])
+    except (KeyError, TypeError, ValueError):
+        abort(400)
+    try:
+        upload_id = upload_store.start(str(data.get('filename', '')), size, user.name)
+    except UploadTooLargeException:
+        return jsonify({'error': 'File too large'}), 413
+    return jsonify({'id': upload_id, 'received': 0})
+
+
+@app.server.route('/uploads/<string:upload_id>', methods=['GET'])
+def get_upload(upload_id):
+    """
+    :param upload_id: id of the upload
+    :return: json with id of the upload and received bytes, used to resume an interrupted upload
+    """
+    info = get_own_upload_info(upload_id)
+    return jsonify({'id': upload_id, 'received': info['received']})
+
+
+@app.server.route('/uploads/<string:upload_id>', methods=['PUT'])
+def upload_chunk(upload_id):
+    """
+    Appends the request body to the upload. The header Upload-Offset has to match the number of already received
+    bytes, otherwise nothing is written and 409 is returned.
+
+    :param upload_id: id of the upload
+    :return: json with id of the upload and received bytes
+    """
+    info = get_own_upload_info(upload_id)
+    offset = request.headers.get('Upload-Offset', type=int)
+    if offset is None:
+        abort(400)
+    if offset != info['received']:
+        return jsonify({'id': upload_id, 'received': info['received']}), 409
+    try:
+        received = upload_store.append(upload_id, offset, request.stream)
+    except UploadNotFoundException:
+        abort(404)
+    except UploadTooLargeException:
+        return jsonify({'error': 'Chunk exceeds the announced size of ' + str(info['size']) + ' bytes'}), 413
+    return jsonify({'id': upload_id, 'received': received})
+
+
+def get_own_upload_info(upload_id):
+    if user.role != 'master':
+        abort(403)
+    info = upload_store.get_info(upload_id)
+    if info is None or info['user'] != user.name:
+        abort(404)
+    return info